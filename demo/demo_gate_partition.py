@@ -11,24 +11,16 @@ import matplotlib.pyplot as plt
 tau = 0.620
 band = 0.050
 
-def gate(score):
-    if score < tau - band:
-        return 0  # DENY
-    elif score > tau + band:
-        return 2  # ALLOW
-    else:
-        return 1  # ABSTAIN
-
 # Structural grid (2D slice with c fixed)
 grid = np.linspace(0.0, 1.0, 101)
 c_fixed = 0.62
 
-Z = np.zeros((len(grid), len(grid)))
+# Rows follow a (y axis), columns follow g (x axis)
+G, A = np.meshgrid(grid, grid, indexing="xy")
+score = (G + A + c_fixed) / 3.0
 
-for i, g in enumerate(grid):
-    for j, a in enumerate(grid):
-        score = (g + a + c_fixed) / 3.0
-        Z[j, i] = gate(score)
+# 0 = DENY, 1 = ABSTAIN, 2 = ALLOW
+Z = np.where(score < tau - band, 0, np.where(score > tau + band, 2, 1)).astype(np.uint8)
 
 plt.figure()
 plt.imshow(
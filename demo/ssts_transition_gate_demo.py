@@ -28,10 +28,10 @@ from __future__ import annotations
 
 import argparse
 import csv
-import math
 import os
 from dataclasses import dataclass
-from typing import List, Tuple
+from itertools import accumulate
+from typing import List, Sequence, Tuple
 
 
 # -----------------------------
@@ -51,10 +51,6 @@ def safe_float(x: str) -> float:
     except Exception as e:
         raise ValueError(f"Invalid float: {x}") from e
 
-def heavi(x: float) -> int:
-    # Heaviside: H(x) = 1 if x >= 0 else 0
-    return 1 if x >= 0.0 else 0
-
 
 # -----------------------------
 # SSTS Gate Core
@@ -95,21 +91,23 @@ def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
     return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
 
 
-def gate_decision(score: float, p: GateParams) -> Tuple[str, str]:
+# (status, base reason code) by rank 0/1/2 = DENY/ABSTAIN/ALLOW
+DECISIONS = (
+    ("DENY", "RC_TR_BELOW_THRESHOLD"),
+    ("ABSTAIN", "RC_TR_NEAR_THRESHOLD"),
+    ("ALLOW", "RC_TR_ADMISSIBLE"),
+)
+
+
+def gate_decision(score: float, low: float, high: float) -> Tuple[str, str]:
     """
-    Convert score into status using:
+    Convert score into status using (low = tau - band, high = tau + band):
       - DENY if score < tau - band
       - ABSTAIN if |score - tau| <= band
       - ALLOW if score > tau + band
+    The rank comes from two compares and indexes the prebuilt DECISIONS pairs.
     """
-    low = p.tau - p.abstain_band
-    high = p.tau + p.abstain_band
-
-    if score < low:
-        return "DENY", "RC_TR_BELOW_THRESHOLD"
-    if score <= high:
-        return "ABSTAIN", "RC_TR_NEAR_THRESHOLD"
-    return "ALLOW", "RC_TR_ADMISSIBLE"
+    return DECISIONS[(score >= low) * (1 + (score > high))]
 
 
 def update_resistance(prev_s: float, r: float, p: GateParams) -> float:
@@ -121,6 +119,69 @@ def update_resistance(prev_s: float, r: float, p: GateParams) -> float:
     return prev_s + (p.k_resist * inc)
 
 
+@dataclass
+class GateBatch:
+    # Column-wise GateResult: field i of every list belongs to scenario i.
+    status: List[str]
+    a: List[float]
+    r: List[float]
+    s: List[float]
+    reason_code: List[str]
+    score: List[float]
+
+
+def ssts_gate_batch(
+    E: Sequence[float],
+    g: Sequence[float],
+    a_int: Sequence[float],
+    c: Sequence[float],
+    prev_s: float,
+    p: GateParams,
+) -> GateBatch:
+    """
+    SSTS admissibility gate over parallel input columns (same rules as ssts_gate).
+    Resistance is carried across the batch in order, starting from prev_s:
+      s_i = s_{i-1} + k * max(0, r_i - r_safe)
+    """
+    # Validate ranges
+    for name, xs in [("g", g), ("a", a_int), ("c", c)]:
+        for x in xs:
+            if x < 0.0 or x > 1.0:
+                raise ValueError(f"{name} must be in [0,1], got {x}")
+
+    score = [structural_score(gi, ai, ci, p) for gi, ai, ci in zip(g, a_int, c)]
+    low = p.tau - p.abstain_band
+    high = p.tau + p.abstain_band
+    decisions = [gate_decision(f, low, high) for f in score]
+    status = [st for st, _ in decisions]
+
+    r = [max(0.0, p.tau - f) for f in score]
+
+    if p.abstain_band > 0.0:
+        a_perm = [max(0.0, min(1.0, (f - low) / (high - low))) for f in score]
+    else:
+        a_perm = [1.0 if f >= p.tau else 0.0 for f in score]
+
+    # Prefix scan of the resistance update (same left-to-right sums as a loop)
+    s_cum = list(accumulate(r, lambda s_prev, ri: update_resistance(s_prev, ri, p), initial=prev_s))[1:]
+
+    # Add specific reason refinements (still deterministic)
+    reason = []
+    for (st, rc), gi, ai, ci in zip(decisions, g, a_int, c):
+        if st == "DENY":
+            if gi < 0.25:
+                rc = "RC_TR_ALIGN_INSUFFICIENT"
+            elif ai < 0.25:
+                rc = "RC_TR_INTERNAL_ACCESS_LOW"
+            elif ci < 0.25:
+                rc = "RC_TR_CONSTRAINT_TOO_WEAK"
+            else:
+                rc = "RC_TR_BELOW_THRESHOLD"
+        reason.append(rc)
+
+    return GateBatch(status=status, a=a_perm, r=r, s=s_cum, reason_code=reason, score=score)
+
+
 def ssts_gate(E: float, g: float, a_int: float, c: float, prev_s: float, p: GateParams) -> GateResult:
     """
     SSTS admissibility gate.
@@ -134,43 +195,14 @@ def ssts_gate(E: float, g: float, a_int: float, c: float, prev_s: float, p: Gate
       a = clamp01( (score - (tau - band)) / (2*band) ) mapped around band
       BUT if band is zero, we fall back to a = 1 if score >= tau else 0
     """
-    # Validate ranges
-    for name, x in [("g", g), ("a", a_int), ("c", c)]:
-        if x < 0.0 or x > 1.0:
-            raise ValueError(f"{name} must be in [0,1], got {x}")
-
-    score = structural_score(g, a_int, c, p)
-    status, reason = gate_decision(score, p)
-
-    r = max(0.0, p.tau - score)
-
-    if p.abstain_band > 0.0:
-        low = p.tau - p.abstain_band
-        high = p.tau + p.abstain_band
-        a_perm = clamp01((score - low) / (high - low))
-    else:
-        a_perm = 1.0 if score >= p.tau else 0.0
-
-    s_new = update_resistance(prev_s, r, p)
-
-    # Add specific reason refinements (still deterministic)
-    if status == "DENY":
-        if g < 0.25:
-            reason = "RC_TR_ALIGN_INSUFFICIENT"
-        elif a_int < 0.25:
-            reason = "RC_TR_INTERNAL_ACCESS_LOW"
-        elif c < 0.25:
-            reason = "RC_TR_CONSTRAINT_TOO_WEAK"
-        else:
-            reason = "RC_TR_BELOW_THRESHOLD"
-
+    b = ssts_gate_batch([E], [g], [a_int], [c], prev_s, p)
     return GateResult(
-        status=status,
-        a=a_perm,
-        r=r,
-        s=s_new,
-        reason_code=reason,
-        score=score,
+        status=b.status[0],
+        a=b.a[0],
+        r=b.r[0],
+        s=b.s[0],
+        reason_code=b.reason_code[0],
+        score=b.score[0],
     )
 
 
@@ -179,17 +211,18 @@ def ssts_gate(E: float, g: float, a_int: float, c: float, prev_s: float, p: Gate
 # -----------------------------
 
 @dataclass(frozen=True)
-class Scenario:
-    scenario_id: str
-    label: str
-    E: float
-    g: float
-    a_int: float
-    c: float
-    note: str
-
-
-def build_scenarios() -> List[Scenario]:
+class Scenarios:
+    # Scenario table stored column-wise (structure of arrays).
+    scenario_id: Tuple[str, ...]
+    label: Tuple[str, ...]
+    E: Tuple[float, ...]
+    g: Tuple[float, ...]
+    a_int: Tuple[float, ...]
+    c: Tuple[float, ...]
+    note: Tuple[str, ...]
+
+
+def build_scenarios() -> Scenarios:
     """
     Deterministic scenarios designed to demonstrate:
       - same E, different (g,a,c) => different admissibility
@@ -198,30 +231,41 @@ def build_scenarios() -> List[Scenario]:
     All values are fixed constants (no randomness).
     """
     E_same = 100.0  # Same energy across many cases to prove gating is structural
-    return [
-        Scenario("S0", "Presence only",              E_same, 0.10, 0.10, 0.10, "State 0: energy present, no coupling"),
-        Scenario("S1", "Alignment rising",           E_same, 0.55, 0.20, 0.20, "State 1: alignment appears, still denied/abstain"),
-        Scenario("S2", "Internal excitation only",   E_same, 0.20, 0.80, 0.20, "State 2: excitation high, still not permitted"),
-        Scenario("S3", "Near admissibility",         E_same, 0.55, 0.55, 0.55, "Borderline: should ABSTAIN (safe default)"),
-        Scenario("S4", "Admissible transition",      E_same, 0.80, 0.70, 0.70, "State 3: permitted -> likely commitment possible"),
-        Scenario("S5", "High E but misaligned",      500.0,  0.15, 0.20, 0.20, "Higher energy does not grant permission"),
-        Scenario("S6", "Catalyst-like context",      E_same, 0.60, 0.55, 0.80, "Context/constraint supports admissibility"),
-        Scenario("S7", "Competing dissipation",      E_same, 0.65, 0.40, 0.35, "Looks energetic, but structure not sustained"),
+    table = [
+        ("S0", "Presence only",              E_same, 0.10, 0.10, 0.10, "State 0: energy present, no coupling"),
+        ("S1", "Alignment rising",           E_same, 0.55, 0.20, 0.20, "State 1: alignment appears, still denied/abstain"),
+        ("S2", "Internal excitation only",   E_same, 0.20, 0.80, 0.20, "State 2: excitation high, still not permitted"),
+        ("S3", "Near admissibility",         E_same, 0.55, 0.55, 0.55, "Borderline: should ABSTAIN (safe default)"),
+        ("S4", "Admissible transition",      E_same, 0.80, 0.70, 0.70, "State 3: permitted -> likely commitment possible"),
+        ("S5", "High E but misaligned",      500.0,  0.15, 0.20, 0.20, "Higher energy does not grant permission"),
+        ("S6", "Catalyst-like context",      E_same, 0.60, 0.55, 0.80, "Context/constraint supports admissibility"),
+        ("S7", "Competing dissipation",      E_same, 0.65, 0.40, 0.35, "Looks energetic, but structure not sustained"),
     ]
+    return Scenarios(*zip(*table))
 
 
 # -----------------------------
 # CSV Evidence Output
 # -----------------------------
 
+FIELDNAMES = (
+    "scenario_id", "label", "E", "g", "a_int", "c", "score_f", "tau", "band",
+    "status", "a_permission", "r_risk", "s_resistance", "reason_code", "note",
+)
+
+
+def ensure_parent_dir(path: str) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+
+
 def write_csv(out_csv: str, rows: List[dict]) -> None:
-    os.makedirs(os.path.dirname(out_csv), exist_ok=True) if os.path.dirname(out_csv) else None
-    fieldnames = list(rows[0].keys()) if rows else []
+    ensure_parent_dir(out_csv)
     with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+        w = csv.writer(f)
+        w.writerow(FIELDNAMES)
+        w.writerows([r[k] for k in FIELDNAMES] for r in rows)
 
 
 # -----------------------------
@@ -242,10 +286,10 @@ def main() -> int:
 
     p = GateParams(tau=float(args.tau), abstain_band=float(args.band))
 
-    scenarios = build_scenarios()
+    sc = build_scenarios()
 
-    # Run sequentially to show resistance accumulation s
-    s_acc = 0.0
+    # Resistance s accumulates across the scenarios in order
+    res = ssts_gate_batch(sc.E, sc.g, sc.a_int, sc.c, 0.0, p)
     rows = []
 
     print("SSTS Transition Gate Demo")
@@ -254,33 +298,30 @@ def main() -> int:
     print(f"Gate: `A_s = H(f(g,a,c) - tau)` with tau={p.tau:.3f}, abstain_band={p.abstain_band:.3f}")
     print("")
 
-    for sc in scenarios:
-        res = ssts_gate(sc.E, sc.g, sc.a_int, sc.c, s_acc, p)
-        s_acc = res.s
-
+    for i in range(len(sc.scenario_id)):
         row = {
-            "scenario_id": sc.scenario_id,
-            "label": sc.label,
-            "E": f"{sc.E:.6f}",
-            "g": f"{sc.g:.6f}",
-            "a_int": f"{sc.a_int:.6f}",
-            "c": f"{sc.c:.6f}",
-            "score_f": f"{res.score:.6f}",
+            "scenario_id": sc.scenario_id[i],
+            "label": sc.label[i],
+            "E": f"{sc.E[i]:.6f}",
+            "g": f"{sc.g[i]:.6f}",
+            "a_int": f"{sc.a_int[i]:.6f}",
+            "c": f"{sc.c[i]:.6f}",
+            "score_f": f"{res.score[i]:.6f}",
             "tau": f"{p.tau:.6f}",
             "band": f"{p.abstain_band:.6f}",
-            "status": res.status,
-            "a_permission": f"{res.a:.6f}",
-            "r_risk": f"{res.r:.6f}",
-            "s_resistance": f"{res.s:.6f}",
-            "reason_code": res.reason_code,
-            "note": sc.note,
+            "status": res.status[i],
+            "a_permission": f"{res.a[i]:.6f}",
+            "r_risk": f"{res.r[i]:.6f}",
+            "s_resistance": f"{res.s[i]:.6f}",
+            "reason_code": res.reason_code[i],
+            "note": sc.note[i],
         }
         rows.append(row)
 
-        print(f"{sc.scenario_id} | {sc.label}")
-        print(f"  Inputs: E={sc.E}, g={sc.g}, a={sc.a_int}, c={sc.c}")
-        print(f"  Score: f={res.score:.3f}  -> status={res.status}  reason={res.reason_code}")
-        print(f"  Outputs: a={res.a:.3f}  r={res.r:.3f}  s={res.s:.3f}")
+        print(f"{sc.scenario_id[i]} | {sc.label[i]}")
+        print(f"  Inputs: E={sc.E[i]}, g={sc.g[i]}, a={sc.a_int[i]}, c={sc.c[i]}")
+        print(f"  Score: f={res.score[i]:.3f}  -> status={res.status[i]}  reason={res.reason_code[i]}")
+        print(f"  Outputs: a={res.a[i]:.3f}  r={res.r[i]:.3f}  s={res.s[i]:.3f}")
         print("")
 
     write_csv(args.out_csv, rows)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+SSTS — run the self-contained phases in one process
+---------------------------------------------------
+Calls main() of every phase that needs no external dataset, in order, with
+each phase's default arguments:
+
+  Phase 2, Phase 3, Phase 5, Phase 5 v2, Phase 6, Phase 7
+
+Output is the same as running the scripts one by one (same CSVs under
+outputs/, same console text); the interpreter, ssts_core and the optional
+NumPy/Numba imports are paid for once instead of per script. The Phase 4A
+scripts read a USPTO .rsmi file and are run separately.
+
+Usage:
+  python scripts/run_all.py
+  python scripts/run_all.py --only ssts_phase6_cross_domain_invariance
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+from typing import Optional, Sequence
+
+PHASES = (
+    "ssts_gate_sweep_phase2",
+    "ssts_phase3_tau_band_sweep",
+    "ssts_phase5_sequence_resistance",
+    "ssts_phase5_sequence_resistance_v2",
+    "ssts_phase6_cross_domain_invariance",
+    "ssts_phase7_canonical_cases",
+)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run the self-contained SSTS phases in one process")
+    ap.add_argument("--only", action="append", choices=PHASES, help="run just this phase (repeatable)")
+    args = ap.parse_args(argv)
+
+    for name in args.only or PHASES:
+        rc = importlib.import_module(name).main([])
+        if rc:
+            print(f"{name} exited with status {rc}")
+            return rc
+        print("")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
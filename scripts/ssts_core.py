@@ -0,0 +1,88 @@
+"""
+SSTS core (shared)
+------------------
+The pieces the Phase 2, 3, 4A, 5, 5 v2, 6 and 7 scripts have in common:
+
+  - GateParams, the gate weights and (tau, band)
+  - safe_float / safe_int argparse types and clamp01
+  - the tau/band gate:
+
+      score = wg*g + wa*a + wc*c
+      DENY if score < tau-band, ABSTAIN if score <= tau+band, else ALLOW
+
+  - ensure_parent_dir / write_lines_csv for the evidence tables
+
+Statuses are ranks 0/1/2 into STATUS_NAMES (the monotone order
+DENY < ABSTAIN < ALLOW). Callers compute low = tau - band and high = tau + band
+once and pass them in. Standard library only; the phase scripts import it from
+this directory when run as `python scripts/<phase>.py` (or via run_all.py).
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+STATUS_NAMES = ("DENY", "ABSTAIN", "ALLOW")
+
+
+def safe_float(x: str) -> float:
+    try:
+        return float(x)
+    except Exception as e:
+        raise ValueError(f"Invalid float: {x}") from e
+
+
+def safe_int(x: str) -> int:
+    try:
+        return int(x)
+    except Exception as e:
+        raise ValueError(f"Invalid int: {x}") from e
+
+
+def clamp01(x: float) -> float:
+    return 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
+
+
+@dataclass(frozen=True)
+class GateParams:
+    wg: float = 0.45
+    wa: float = 0.35
+    wc: float = 0.20
+    tau: float = 0.62
+    band: float = 0.05
+
+
+def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
+    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
+
+
+def gate_rank(score: float, low: float, high: float) -> int:
+    # Two compares instead of branches. The product keeps the order of tests
+    # (below low first), so band < 0 still never gives ABSTAIN.
+    return (score >= low) * (1 + (score > high))
+
+
+def score_and_rank_cols(
+    g: Sequence[float], a: Sequence[float], c: Sequence[float],
+    wg: float, wa: float, wc: float,
+    low: float, high: float,
+) -> Tuple[List[float], List[int]]:
+    # Scores (structural_score order) and gate ranks as parallel lists.
+    scores = [(wg * gi) + (wa * ai) + (wc * ci) for gi, ai, ci in zip(g, a, c)]
+    return scores, [gate_rank(s, low, high) for s in scores]
+
+
+def ensure_parent_dir(path: str) -> None:
+    d = os.path.dirname(path)
+    if d:
+        os.makedirs(d, exist_ok=True)
+
+
+def write_lines_csv(path: str, fieldnames: Sequence[str], lines: List[str]) -> None:
+    # lines are complete CRLF rows whose cells never need quoting (as
+    # csv.DictWriter wrote them); the table goes out in a single write
+    ensure_parent_dir(path)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        f.write(",".join(fieldnames) + "\r\n" + "".join(lines))
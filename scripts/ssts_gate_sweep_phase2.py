@@ -12,45 +12,33 @@ Key axiom remains:
   `Energy_legal != Transition_admissible`
 
 No simulation, no kinetics, no chemistry engine.
+NumPy is optional: when present the grid is evaluated as arrays; the
+stdlib loop is kept as the reference path and produces identical output.
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
-import os
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, TextIO, Tuple
 
+from ssts_core import STATUS_NAMES, GateParams, ensure_parent_dir, safe_float, safe_int, structural_score
 
-def clamp01(x: float) -> float:
-    return 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
+try:
+    import numpy as np
+except ImportError:  # optional accelerator; stdlib path below is authoritative
+    np = None
 
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
+STATUS_CODE = {st: i for i, st in enumerate(STATUS_NAMES)}
 
-def safe_int(x: str) -> int:
-    try:
-        return int(x)
-    except Exception as e:
-        raise ValueError(f"Invalid int: {x}") from e
+FIELDNAMES = (
+    "g", "a_int", "c", "score_f", "tau", "band",
+    "status", "a_permission", "r_risk",
+)
 
-
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.35
-    wc: float = 0.20
-    tau: float = 0.62
-    band: float = 0.05
-
-
-def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
-    # f = wg*g + wa*a + wc*c
-    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
+# One C-level %-format per row; same bytes as f"{x:.6f}" cells written by
+# the csv module (CRLF rows, no field ever needs quoting).
+ROW_FMT = "%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%s,%.6f,%.6f\r\n"
 
 
 def gate_status(score: float, p: GateParams) -> str:
@@ -63,33 +51,22 @@ def gate_status(score: float, p: GateParams) -> str:
     return "ALLOW"
 
 
-def permission_level(score: float, p: GateParams) -> float:
-    if p.band <= 0.0:
-        return 1.0 if score >= p.tau else 0.0
-    low = p.tau - p.band
-    high = p.tau + p.band
-    return clamp01((score - low) / (high - low))
-
-
-def risk_proxy(score: float, p: GateParams) -> float:
-    # Asymmetric risk (only below tau), same as Phase 1 script
-    return max(0.0, p.tau - score)
-
+def open_csv(path: str, fieldnames: Sequence[str]) -> TextIO:
+    # Rows are streamed into the returned file as they are produced (ROW_FMT).
+    ensure_parent_dir(path)
+    f = open(path, "w", newline="", encoding="utf-8")
+    f.write(",".join(fieldnames) + "\r\n")
+    return f
 
-def status_rank(st: str) -> int:
-    # monotone order: DENY < ABSTAIN < ALLOW
-    return {"DENY": 0, "ABSTAIN": 1, "ALLOW": 2}[st]
 
+SweepResult = Tuple[
+    Dict[str, int],
+    int,
+    List[Tuple[Tuple[int, int, int], str, str]],
+]
 
-def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True) if os.path.dirname(path) else None
-    if not rows:
-        raise ValueError("No rows to write")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+# Rows formatted and written per block in the NumPy path.
+CHUNK_ROWS = 65536
 
 
 def grid_values(n: int) -> List[float]:
@@ -99,13 +76,129 @@ def grid_values(n: int) -> List[float]:
     return [i * step for i in range(n)]
 
 
-def main() -> int:
+def sweep_python(vals: List[float], p: GateParams, out: TextIO) -> SweepResult:
+    # Reference sweep (stdlib only); sweep_numpy must reproduce it exactly.
+    n = len(vals)
+    counts = {"DENY": 0, "ABSTAIN": 0, "ALLOW": 0}
+
+    # Status code per grid point, flat (g,a,c) index order, one byte each.
+    # Codes follow the monotone order DENY < ABSTAIN < ALLOW.
+    status = bytearray(n * n * n)
+
+    # Permission ramps 0..1 across the ABSTAIN band (a step at tau when band <= 0);
+    # risk is asymmetric (only below tau), same as Phase 1 script.
+    low = p.tau - p.band
+    high = p.tau + p.band
+    span = high - low
+
+    idx = 0
+    for g in vals:
+        for a_int in vals:
+            for c in vals:
+                score = structural_score(g, a_int, c, p)
+                st = gate_status(score, p)
+                counts[st] += 1
+                status[idx] = STATUS_CODE[st]
+                idx += 1
+
+                if p.band <= 0.0:
+                    a_perm = 1.0 if score >= p.tau else 0.0
+                else:
+                    a_perm = max(0.0, min(1.0, (score - low) / span))
+                out.write(ROW_FMT % (
+                    g, a_int, c, score, p.tau, p.band, st,
+                    a_perm, max(0.0, p.tau - score),
+                ))
+
+    # Monotonicity proof under uniform increases:
+    # If we increase all indices by +1 (where possible), status rank must not decrease.
+    violations = 0
+    worst_examples: List[Tuple[Tuple[int,int,int], str, str]] = []
+
+    step = n * n + n + 1  # flat offset of (+1,+1,+1)
+    for ig in range(n - 1):
+        for ia in range(n - 1):
+            base = (ig * n + ia) * n
+            for ic in range(n - 1):
+                s0 = status[base + ic]
+                s1 = status[base + ic + step]
+                if s1 < s0:
+                    violations += 1
+                    if len(worst_examples) < 10:
+                        worst_examples.append(((ig, ia, ic), STATUS_NAMES[s0], STATUS_NAMES[s1]))
+
+    return counts, violations, worst_examples
+
+
+def sweep_numpy(vals: List[float], p: GateParams, out: TextIO) -> SweepResult:
+    # Same sweep as sweep_python, evaluated in (k,n,n) slabs of consecutive g values.
+    # Only the uint8 status cube (n^3 bytes) is kept for the whole grid.
+    n = len(vals)
+    v = np.asarray(vals, dtype=np.float64)
+    wa_a = p.wa * v
+    wc_c = p.wc * v
+
+    low = p.tau - p.band
+    high = p.tau + p.band
+
+    # uint8 codes 0/1/2 = DENY/ABSTAIN/ALLOW (1 byte per grid point)
+    status = np.empty((n, n, n), dtype=np.uint8)
+
+    k = max(1, CHUNK_ROWS // (n * n))
+    for i0 in range(0, n, k):
+        g_blk = v[i0:i0 + k, None, None]
+        shape = (g_blk.shape[0], n, n)
+
+        # score = (wg*g + wa*a) + wc*c, accumulated in place
+        score = np.multiply(g_blk, p.wg, out=np.empty(shape))
+        score += wa_a[None, :, None]
+        score += wc_c[None, None, :]
+
+        st = status[i0:i0 + k]
+        np.greater_equal(score, low, out=st, casting="unsafe")
+        st += score > high
+
+        # permission and risk reuse one scratch slab
+        if p.band <= 0.0:
+            a_perm = (score >= p.tau).astype(np.float64)
+        else:
+            a_perm = np.subtract(score, low)
+            np.divide(a_perm, high - low, out=a_perm)
+            np.clip(a_perm, 0.0, 1.0, out=a_perm)
+        r_risk = np.subtract(p.tau, score)
+        np.maximum(r_risk, 0.0, out=r_risk)
+
+        out.writelines(ROW_FMT % r for r in zip(
+            np.broadcast_to(g_blk, shape).ravel().tolist(),
+            np.broadcast_to(v[None, :, None], shape).ravel().tolist(),
+            np.broadcast_to(v[None, None, :], shape).ravel().tolist(),
+            score.ravel().tolist(), repeat(p.tau), repeat(p.band),
+            map(STATUS_NAMES.__getitem__, st.ravel().tolist()),
+            a_perm.ravel().tolist(), r_risk.ravel().tolist(),
+        ))
+
+    n_deny, n_abstain, n_allow = np.bincount(status.ravel(), minlength=3).tolist()
+    counts = {"DENY": n_deny, "ABSTAIN": n_abstain, "ALLOW": n_allow}
+
+    # Monotonicity under uniform +1 steps, as one array comparison.
+    drop = status[1:, 1:, 1:] < status[:-1, :-1, :-1]
+    violations = int(np.count_nonzero(drop))
+    worst_examples: List[Tuple[Tuple[int, int, int], str, str]] = []
+    for ig, ia, ic in np.argwhere(drop)[:10].tolist():
+        st0 = STATUS_NAMES[status[ig, ia, ic]]
+        st1 = STATUS_NAMES[status[ig + 1, ia + 1, ic + 1]]
+        worst_examples.append(((ig, ia, ic), st0, st1))
+
+    return counts, violations, worst_examples
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="SSTS Phase 2 sweep + monotonicity proof")
     ap.add_argument("--grid_n", type=safe_int, default=11, help="grid points per axis (>=2 recommended)")
     ap.add_argument("--tau", type=safe_float, default=0.62, help="tau in [0,1]")
     ap.add_argument("--band", type=safe_float, default=0.05, help="abstain band >=0")
     ap.add_argument("--out_csv", type=str, default="outputs/ssts_phase2_sweep.csv", help="CSV output path")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     if args.tau < 0.0 or args.tau > 1.0:
         raise ValueError("--tau must be in [0,1]")
@@ -118,50 +211,9 @@ def main() -> int:
 
     vals = grid_values(args.grid_n)
 
-    # Sweep
-    rows: List[Dict[str, str]] = []
-    counts = {"DENY": 0, "ABSTAIN": 0, "ALLOW": 0}
-
-    # Store status at each grid point for monotonicity checks
-    status_map: Dict[Tuple[int, int, int], str] = {}
-
-    for ig, g in enumerate(vals):
-        for ia, a_int in enumerate(vals):
-            for ic, c in enumerate(vals):
-                score = structural_score(g, a_int, c, p)
-                st = gate_status(score, p)
-                counts[st] += 1
-                status_map[(ig, ia, ic)] = st
-
-                row = {
-                    "g": f"{g:.6f}",
-                    "a_int": f"{a_int:.6f}",
-                    "c": f"{c:.6f}",
-                    "score_f": f"{score:.6f}",
-                    "tau": f"{p.tau:.6f}",
-                    "band": f"{p.band:.6f}",
-                    "status": st,
-                    "a_permission": f"{permission_level(score, p):.6f}",
-                    "r_risk": f"{risk_proxy(score, p):.6f}",
-                }
-                rows.append(row)
-
-    # Monotonicity proof under uniform increases:
-    # If we increase all indices by +1 (where possible), status rank must not decrease.
-    violations = 0
-    worst_examples: List[Tuple[Tuple[int,int,int], str, str]] = []
-
-    for ig in range(args.grid_n - 1):
-        for ia in range(args.grid_n - 1):
-            for ic in range(args.grid_n - 1):
-                st0 = status_map[(ig, ia, ic)]
-                st1 = status_map[(ig + 1, ia + 1, ic + 1)]
-                if status_rank(st1) < status_rank(st0):
-                    violations += 1
-                    if len(worst_examples) < 10:
-                        worst_examples.append(((ig, ia, ic), st0, st1))
-
-    write_csv(args.out_csv, rows)
+    sweep = sweep_numpy if np is not None else sweep_python
+    with open_csv(args.out_csv, FIELDNAMES) as out:
+        counts, violations, worst_examples = sweep(vals, p, out)
 
     total = args.grid_n ** 3
     print("SSTS Phase 2 — Deterministic Sweep")
@@ -3,9 +3,24 @@
 
 import argparse
 import csv
+import functools
 import random
 import hashlib
 
+try:
+    import numpy as np
+except ImportError:  # optional: batches are then scored row by row
+    np = None
+
+MARKERS = ["=", "#", "(", ")", "@", "+", "-", "[", "]"]
+MODES = ["identity", "swap", "shuffle", "strip_context"]
+STATUS_NAMES = ("DENY", "ABSTAIN", "ALLOW")
+BATCH_LINES = 10000
+
+# a-proxy for every 9-bit marker-difference mask: popcount / len(MARKERS),
+# divided once here instead of per row
+MARKER_FRAC = [bin(m).count("1") / len(MARKERS) for m in range(1 << len(MARKERS))]
+
 def parse_rsmi(line):
     # Expected: reactants > reagents > products OR reactants >> products
     line = line.strip()
@@ -21,18 +36,30 @@ def parse_rsmi(line):
 def canonical(s):
     return "".join(s.split())
 
+# Negative controls reuse the same r/p strings, so each distinct string is
+# profiled once; marker presence and dots use C-level `in` / count scans.
+@functools.lru_cache(maxsize=200000)
+def symbol_profile(s):
+    # (canonical form, marker mask, dot count); bit i of the mask set when MARKERS[i] occurs in s
+    mask = 0
+    for i, m in enumerate(MARKERS):
+        if m in s:
+            mask |= 1 << i
+    return canonical(s), mask, s.count(".")
+
 def structural_proxies(r, c, p):
+    r_canon, r_mask, r_dots = symbol_profile(r)
+    p_canon, p_mask, p_dots = symbol_profile(p)
+
     # g: alignment (non-identity + fragment delta)
     g = 0.0
-    if canonical(r) != canonical(p):
+    if r_canon != p_canon:
         g += 0.5
-    g += min(0.5, abs(r.count(".") - p.count(".")) * 0.25)
+    g += min(0.5, abs(r_dots - p_dots) * 0.25)
     g = min(g, 1.0)
 
-    # a: internal access (symbol changes)
-    markers = ["=", "#", "(", ")", "@", "+", "-", "[", "]"]
-    a = sum(1 for m in markers if (m in r) != (m in p)) / len(markers)
-    a = min(a, 1.0)
+    # a: internal access (symbol changes) = markers present on one side only
+    a = MARKER_FRAC[r_mask ^ p_mask]
 
     # c: context presence
     c_val = 1.0 if len(c.strip()) > 0 else 0.0
@@ -43,11 +70,13 @@ def score(g, a, c):
     return 0.4 * g + 0.4 * a + 0.2 * c
 
 def gate(f, tau, band):
+    # Status code 0/1/2 (index into STATUS_NAMES).
+    # ALLOW is checked first, so it also wins when the band is empty (band <= 0).
     if f >= tau + band:
-        return "ALLOW"
+        return 2
     if f <= tau - band:
-        return "DENY"
-    return "ABSTAIN"
+        return 0
+    return 1
 
 def make_negative(r, c, p, mode):
     if mode == "identity":
@@ -62,6 +91,68 @@ def make_negative(r, c, p, mode):
         return r, "", p
     raise ValueError(mode)
 
+def score_batch(triples, tau, band):
+    # Columns (g, a, c, score, status) for a list of (r, c, p) triples.
+    # Status is 0/1/2 = DENY/ABSTAIN/ALLOW; values match structural_proxies/score/gate.
+    if np is None:
+        cols = ([], [], [], [], [])
+        for r, c, p in triples:
+            g, a, cval = structural_proxies(r, c, p)
+            fval = score(g, a, cval)
+            for col, v in zip(cols, (g, a, cval, fval, gate(fval, tau, band))):
+                col.append(v)
+        return cols
+
+    r_prof = [symbol_profile(t[0]) for t in triples]
+    p_prof = [symbol_profile(t[2]) for t in triples]
+
+    neq = np.array([rp[0] != pp[0] for rp, pp in zip(r_prof, p_prof)], dtype=bool)
+    r_dots = np.array([rp[2] for rp in r_prof], dtype=np.int64)
+    p_dots = np.array([pp[2] for pp in p_prof], dtype=np.int64)
+    g = np.where(neq, 0.5, 0.0) + np.minimum(0.5, np.abs(r_dots - p_dots) * 0.25)
+    g = np.minimum(g, 1.0)
+
+    r_mask = np.array([rp[1] for rp in r_prof], dtype=np.int64)
+    p_mask = np.array([pp[1] for pp in p_prof], dtype=np.int64)
+    a = np.asarray(MARKER_FRAC)[r_mask ^ p_mask]
+
+    cval = np.array([1.0 if len(t[1].strip()) > 0 else 0.0 for t in triples], dtype=np.float64)
+
+    fval = 0.4 * g + 0.4 * a + 0.2 * cval
+    allow = fval >= tau + band
+    status = allow.astype(np.uint8) + (allow | (fval > tau - band))
+    return g.tolist(), a.tolist(), cval.tolist(), fval.tolist(), status.tolist()
+
+def flush_batch(batch, args, counts, writer):
+    # batch: list of (line_idx, r, c, p); each line yields REAL + one row per mode.
+    triples = []
+    for _, r, c, p in batch:
+        triples.append((r, c, p))
+        for m in MODES:
+            triples.append(make_negative(r, c, p, m))
+
+    g, a, cval, fval, status = score_batch(triples, args.tau, args.band)
+
+    width = 1 + len(MODES)
+    if np is not None:
+        # status * 2 + is_real is at most 5, so the whole tally key stays uint8
+        is_real = np.zeros(len(triples), dtype=np.uint8)
+        is_real[::width] = 1
+        tally = np.bincount(np.asarray(status, dtype=np.uint8) * 2 + is_real, minlength=6).tolist()
+        for k, v in enumerate(tally):
+            counts[k] += v
+    else:
+        for j, st in enumerate(status):
+            counts[st * 2 + (j % width == 0)] += 1
+
+    for n, (i, _, _, _) in enumerate(batch):
+        if i % args.every_k != 0:
+            continue
+        j = n * width
+        writer.writerow(["REAL", g[j], a[j], cval[j], fval[j], STATUS_NAMES[status[j]], 1])
+        for k, m in enumerate(MODES, start=1):
+            writer.writerow([m, g[j + k], a[j + k], cval[j + k], fval[j + k], STATUS_NAMES[status[j + k]], 0])
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--rsmi", required=True)
@@ -75,13 +166,8 @@ def main():
 
     random.seed(0)
 
-    counts = {
-        ("ALLOW", 1): 0, ("ALLOW", 0): 0,
-        ("ABSTAIN", 1): 0, ("ABSTAIN", 0): 0,
-        ("DENY", 1): 0, ("DENY", 0): 0,
-    }
-
-    modes = ["identity", "swap", "shuffle", "strip_context"]
+    # 3x2 counts matrix, row-major: counts[status * 2 + reaction_is_real]
+    counts = [0] * (len(STATUS_NAMES) * 2)
 
     with open(args.rsmi, "r", encoding="utf-8", errors="ignore") as f, \
          open(args.out_csv, "w", newline="", encoding="utf-8") as out:
@@ -91,6 +177,7 @@ def main():
             "mode", "g", "a", "c", "score", "status", "reaction_is_real"
         ])
 
+        batch = []
         for i, line in enumerate(f):
             if i >= args.max_lines:
                 break
@@ -99,36 +186,24 @@ def main():
                 continue
 
             r, c, p = parsed
+            batch.append((i, r, c, p))
+            if len(batch) >= BATCH_LINES:
+                flush_batch(batch, args, counts, writer)
+                batch = []
 
-            # Positive (real)
-            g, a, cval = structural_proxies(r, c, p)
-            fval = score(g, a, cval)
-            status = gate(fval, args.tau, args.band)
-            counts[(status, 1)] += 1
-
-            if i % args.every_k == 0:
-                writer.writerow(["REAL", g, a, cval, fval, status, 1])
-
-            # Negatives
-            for m in modes:
-                r2, c2, p2 = make_negative(r, c, p, m)
-                g2, a2, c2v = structural_proxies(r2, c2, p2)
-                f2 = score(g2, a2, c2v)
-                s2 = gate(f2, args.tau, args.band)
-                counts[(s2, 0)] += 1
-
-                if i % args.every_k == 0:
-                    writer.writerow([m, g2, a2, c2v, f2, s2, 0])
+        if batch:
+            flush_batch(batch, args, counts, writer)
 
     with open(args.out_summary, "w", newline="", encoding="utf-8") as out:
         writer = csv.writer(out)
         writer.writerow(["status", "reaction_is_real", "count"])
-        for (s, r), v in counts.items():
-            writer.writerow([s, r, v])
+        for st in reversed(range(len(STATUS_NAMES))):
+            for r in (1, 0):
+                writer.writerow([STATUS_NAMES[st], r, counts[st * 2 + r]])
 
     print("Phase 4A.1 complete")
-    for k in sorted(counts):
-        print(f"{k}: {counts[k]}")
+    for name, r in sorted((name, r) for name in STATUS_NAMES for r in (0, 1)):
+        print(f"{(name, r)}: {counts[STATUS_NAMES.index(name) * 2 + r]}")
 
 if __name__ == "__main__":
     main()
@@ -1,13 +1,23 @@
 #!/usr/bin/env python3
 """
 SSTS Phase 4A.2 — Direction & coherence admissibility
-Adds a minimal direction/context observable to separate swap/shuffle controls.
+Adds a minimal direction/context observable (d_eff) alongside the Phase 4A proxies.
+Known issue: d_eff uses abs(len(P) - len(R)), so it is symmetric and SWAP and
+SHUFFLE rows always equal REAL; this phase does not separate those controls
+(Phase 4A.3 does, via role asymmetry and order coherence).
 """
 
 import argparse
 import csv
 from collections import Counter
 
+KINDS = ("REAL", "SWAP", "SHUFFLE")
+WRITE_BATCH = 4096  # evidence lines buffered per writelines() call
+
+# Evidence line after the kind column: floats as repr (what csv.writer emitted),
+# fixed literal status, CRLF terminator; no field ever needs quoting.
+ROW_TAIL = ",%r,%r,%r,%r,%r,%s\r\n"
+
 def clamp01(x):
     return max(0.0, min(1.0, x))
 
@@ -19,24 +29,36 @@ def gate(score, tau, band):
     return "ABSTAIN"
 
 def direction_coherence(R, P, c):
-    # Minimal direction proxy: length change scaled by context presence
+    # Minimal direction proxy: length change scaled by context presence.
+    # Known issue: abs() makes it symmetric in (R, P), so SWAP can never differ
+    # from REAL. A signed delta would fix that but changes published results.
     if not R or not P:
         return 0.0
     d = abs(len(P) - len(R)) / max(len(P), len(R))
     return d * c
 
+def iter_lines(f):
+    # Byte lines split as text mode's universal newlines did: LF, CRLF and a lone
+    # CR all end a line (a CR-only file arrives as one chunk and is split here).
+    for line in f:
+        if b"\r" in line:
+            yield from line.splitlines()
+        else:
+            yield line
+
 def parse_rsmi_line(line):
     # Expected: reactants > reagents > products OR reactants >> products
+    # RSMI is ASCII: lines stay bytes (no decode); only lengths reach the CSV.
     line = line.strip()
     if not line:
         return None
 
-    if ">>" in line:
-        r, p = line.split(">>", 1)
-        return r.strip(), "", p.strip()
+    if b">>" in line:
+        r, p = line.split(b">>", 1)
+        return r.strip(), b"", p.strip()
 
-    if ">" in line:
-        parts = line.split(">")
+    if b">" in line:
+        parts = line.split(b">")
         if len(parts) >= 3:
             return parts[0].strip(), parts[1].strip(), parts[2].strip()
 
@@ -53,16 +75,18 @@ def main():
     ap.add_argument("--out_summary", required=True)
     args = ap.parse_args()
 
-    counts = Counter()
+    # Every line yields one row per kind with the same status (see below), so
+    # statuses are counted once per line and shared by all kinds.
+    status_counts = Counter()
     seen = 0
 
-    with open(args.rsmi, "r", encoding="utf-8", errors="ignore") as f, \
-         open(args.out_csv, "w", newline="", encoding="utf-8") as out:
+    with open(args.rsmi, "rb", buffering=1 << 20) as f, \
+         open(args.out_csv, "w", newline="", encoding="utf-8", buffering=1 << 20) as out:
 
-        writer = csv.writer(out)
-        writer.writerow(["kind", "g", "a", "c", "d_eff", "score", "status"])
+        out.write("kind,g,a,c,d_eff,score,status\r\n")
+        batch = []
 
-        for line in f:
+        for line in iter_lines(f):
             if seen >= args.max_lines:
                 break
             seen += 1
@@ -81,37 +105,31 @@ def main():
             a = clamp01(len(P) / max(len(R), 1))
             c = clamp01(len(C) / max(len(R) + len(P), 1))
 
-            # REAL
+            # d_eff depends only on len(R), len(P) and c. SWAP keeps both lengths
+            # and SHUFFLE (sorted R) keeps len(R), so all three kinds share one
+            # d_eff / score / status: this observable cannot separate them.
             d_eff = direction_coherence(R, P, c)
             score = (g + a + c + d_eff) / 4.0
             status = gate(score, args.tau, args.band)
-            counts[("REAL", status)] += 1
-            writer.writerow(["REAL", g, a, c, d_eff, score, status])
-
-            # SWAP
-            d_eff_s = direction_coherence(P, R, c)
-            score_s = (g + a + c + d_eff_s) / 4.0
-            status_s = gate(score_s, args.tau, args.band)
-            counts[("SWAP", status_s)] += 1
-            writer.writerow(["SWAP", g, a, c, d_eff_s, score_s, status_s])
-
-            # SHUFFLE (character-order proxy; deterministic)
-            Rsh = "".join(sorted(R))
-            d_eff_h = direction_coherence(Rsh, P, c)
-            score_h = (g + a + c + d_eff_h) / 4.0
-            status_h = gate(score_h, args.tau, args.band)
-            counts[("SHUFFLE", status_h)] += 1
-            writer.writerow(["SHUFFLE", g, a, c, d_eff_h, score_h, status_h])
+            tail = ROW_TAIL % (g, a, c, d_eff, score, status)
+            status_counts[status] += 1
+            batch += [kind + tail for kind in KINDS]
+            if len(batch) >= WRITE_BATCH:
+                out.writelines(batch)
+                batch.clear()
+
+        out.writelines(batch)
 
     with open(args.out_summary, "w", newline="", encoding="utf-8") as sf:
         w = csv.writer(sf)
         w.writerow(["kind", "status", "count"])
-        for (k, s), v in sorted(counts.items()):
-            w.writerow([k, s, v])
+        for k in sorted(KINDS):
+            for s, v in sorted(status_counts.items()):
+                w.writerow([k, s, v])
 
     print("Phase 4A.2 complete")
-    for k in ["REAL", "SWAP", "SHUFFLE"]:
-        print(k, {s: counts[(k, s)] for s in ["ALLOW", "ABSTAIN", "DENY"]})
+    for k in KINDS:
+        print(k, {s: status_counts[s] for s in ["ALLOW", "ABSTAIN", "DENY"]})
 
 if __name__ == "__main__":
     main()
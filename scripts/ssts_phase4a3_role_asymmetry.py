@@ -12,7 +12,20 @@ No ML. No chemistry engines. No tuning. Deterministic. Offline.
 import argparse
 import csv
 import re
-from collections import Counter, defaultdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import add
+
+try:
+    import numpy as np
+except ImportError:  # optional: g/a/c and the gate are then computed row by row
+    np = None
+
+KINDS = ["REAL", "SWAP", "SHUFFLE", "IDENTITY", "STRIP_CTX"]
+STATUS_NAMES = ("DENY", "ABSTAIN", "ALLOW")
+STATUS_CODE = {st: i for i, st in enumerate(STATUS_NAMES)}
+BATCH_ROWS = 10000
 
 def clamp01(x):
     if x < 0.0:
@@ -28,18 +41,28 @@ def gate(score, tau, band):
         return "DENY"
     return "ABSTAIN"
 
+def iter_lines(f):
+    # Byte lines split as text mode's universal newlines did: LF, CRLF and a lone
+    # CR all end a line (a CR-only file arrives as one chunk and is split here).
+    for line in f:
+        if b"\r" in line:
+            yield from line.splitlines()
+        else:
+            yield line
+
 def parse_rsmi_line(line):
     # Expected: reactants > reagents > products OR reactants >> products
+    # RSMI is ASCII: lines stay bytes (no decode); only numbers reach the CSV.
     line = line.strip()
     if not line:
         return None
 
-    if ">>" in line:
-        r, p = line.split(">>", 1)
-        return r.strip(), "", p.strip()
+    if b">>" in line:
+        r, p = line.split(b">>", 1)
+        return r.strip(), b"", p.strip()
 
-    if ">" in line:
-        parts = line.split(">")
+    if b">" in line:
+        parts = line.split(b">")
         if len(parts) >= 3:
             return parts[0].strip(), parts[1].strip(), parts[2].strip()
 
@@ -48,24 +71,28 @@ def parse_rsmi_line(line):
 # Minimal SMILES tokenization (deterministic, role-aware enough for overlap)
 # Captures bracket atoms, common 2-letter elements, and single-letter elements (incl aromatic lower-case).
 TOK_RE = re.compile(
-    r"(\[[^\]]+\]|Cl|Br|Si|Na|Li|Mg|Al|Ca|Fe|Zn|Cu|Sn|Ag|Au|Hg|Pb|"
-    r"I|B|C|N|O|P|S|F|K|H|c|n|o|s|p)"
+    rb"(\[[^\]]+\]|Cl|Br|Si|Na|Li|Mg|Al|Ca|Fe|Zn|Cu|Sn|Ag|Au|Hg|Pb|"
+    rb"I|B|C|N|O|P|S|F|K|H|c|n|o|s|p)"
 )
 
-def smiles_tokens(smiles):
+def smiles_token_counts(smiles):
+    # Token multiset; overlap_ratio only needs counts, never token order.
     if not smiles:
-        return []
-    return TOK_RE.findall(smiles)
+        return Counter()
+    return Counter(TOK_RE.findall(smiles))
 
-def overlap_ratio(A_tokens, B_tokens):
-    # |A ∩ B| / |B|
-    if not B_tokens:
+def overlap_ratio(ca, cb):
+    # |A ∩ B| / |B| over token multisets (Counters)
+    if not cb:
         return 0.0
-    ca = Counter(A_tokens)
-    cb = Counter(B_tokens)
+    # min() is symmetric, so walk the side with fewer distinct tokens
+    # (usually the context) and probe the other one.
+    small, large = (ca, cb) if len(ca) < len(cb) else (cb, ca)
     inter = 0
-    for t, nb in cb.items():
-        inter += min(nb, ca.get(t, 0))
+    for t, n in small.items():
+        m = large.get(t)
+        if m:
+            inter += n if n < m else m
     return inter / max(sum(cb.values()), 1)
 
 def bigrams(s):
@@ -73,10 +100,10 @@ def bigrams(s):
         return set()
     # Keep raw characters; do not normalize away symbols (deterministic).
     # Remove whitespace just in case.
-    s = s.replace(" ", "")
-    if len(s) < 2:
-        return set()
-    return {s[i:i+2] for i in range(len(s)-1)}
+    s = s.replace(b" ", b"")
+    # Bigrams as (byte, byte) pairs of small cached ints, so no 2-char
+    # substring is allocated per position. Fewer than 2 bytes -> empty.
+    return set(zip(s, s[1:]))
 
 def jaccard(A, B):
     if not A and not B:
@@ -84,8 +111,8 @@ def jaccard(A, B):
     if not A or not B:
         return 0.0
     inter = len(A & B)
-    uni = len(A | B)
-    return inter / max(uni, 1)
+    # |A ∪ B| = |A| + |B| - |A ∩ B|; no union set needed
+    return inter / (len(A) + len(B) - inter)
 
 def compute_gac(R, C, P):
     # Same proxies as earlier phases (kept intentionally)
@@ -94,31 +121,126 @@ def compute_gac(R, C, P):
     c = clamp01(len(C) / max(len(R) + len(P), 1))
     return g, a, c
 
-def compute_rk(R, C, P):
-    # Role-asymmetry r
-    Rt = smiles_tokens(R)
-    Ct = smiles_tokens(C)
-    Pt = smiles_tokens(P)
-
-    ov_cp = overlap_ratio(Ct, Pt)
-    ov_cr = overlap_ratio(Ct, Rt)
-
+def probe_gac(R, C, P):
+    # (g, a, c) for the five probes in KINDS order; the probe inputs are
+    # SWAP (P, C, R), SHUFFLE (sorted R, C, P), IDENTITY (R, C, R) and
+    # STRIP_CTX (R, "", P). The proxies only see side lengths, so only REAL
+    # and SWAP need compute_gac(); the rest follow exactly:
+    #   SWAP c, SHUFFLE      len(R) + len(P) and len(sorted R) are unchanged
+    #   IDENTITY             g as REAL, a = len(R)/max(len(R),1), c over 2*len(R)
+    #   STRIP_CTX            empty C zeroes g and c, a as REAL
+    real = compute_gac(R, C, P)
+    g, a, c = real
+    g_sw, a_sw, _ = compute_gac(P, C, R)
+    a_id = 1.0 if R else 0.0
+    c_id = clamp01(len(C) / max(len(R) + len(R), 1))
+    return [real, (g_sw, a_sw, c), real, (g, a_id, c_id), (0.0, a, 0.0)]
+
+def role_asymmetry(ov_cp, ov_cr):
     # Map [-1,1] -> [0,1]
-    r = clamp01((ov_cp - ov_cr + 1.0) / 2.0)
-
-    # Coherence k (order-sensitive)
-    k = clamp01(jaccard(bigrams(R), bigrams(P)))
-
-    return r, k
-
-def write_row(writer, kind, g, a, c, r, k, score, status):
-    writer.writerow([
-        kind,
-        f"{g:.6f}", f"{a:.6f}", f"{c:.6f}",
-        f"{r:.6f}", f"{k:.6f}",
-        f"{score:.6f}",
-        status
-    ])
+    return clamp01((ov_cp - ov_cr + 1.0) / 2.0)
+
+def probe_rk(R, C, P, Rsh):
+    # (r, k) for the five probes in KINDS order. Each side is tokenized and
+    # bigrammed once per row and shared by the probes that reuse it.
+    #   r: role-asymmetry from ov(C,P) - ov(C,R)
+    #   k: coherence (order-sensitive) via bigram Jaccard between R and P
+    tR, tC, tP, tRsh = (smiles_token_counts(x) for x in (R, C, P, Rsh))
+    bR, bP = bigrams(R), bigrams(P)
+
+    ov_cp = overlap_ratio(tC, tP)
+    ov_cr = overlap_ratio(tC, tR)
+    k = clamp01(jaccard(bR, bP))
+
+    return [
+        (role_asymmetry(ov_cp, ov_cr), k),                   # REAL
+        (role_asymmetry(ov_cr, ov_cp), k),                   # SWAP (Jaccard is symmetric)
+        (role_asymmetry(ov_cp, overlap_ratio(tC, tRsh)),
+         clamp01(jaccard(bigrams(Rsh), bP))),                # SHUFFLE
+        (0.5, 1.0),                                          # IDENTITY: ov terms cancel, J(R,R) = 1
+        (0.5, k),                                            # STRIP_CTX: empty C overlaps nothing
+    ]
+
+# Evidence line in one %-format; kinds and statuses are fixed literals, so the
+# csv module's quoting never applies and its CRLF terminator is kept by hand.
+ROW_FMT = "%s,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%s\r\n"
+
+def format_row(kind, g, a, c, r, k, score, status):
+    return ROW_FMT % (kind, g, a, c, r, k, score, status)
+
+def sorted_bytes(s):
+    # SHUFFLE input: the bytes of s in ascending order. NumPy's sort wins once
+    # s is longer than a few dozen bytes (typical reactant sides are ~170).
+    if np is not None and len(s) > 40:
+        return np.sort(np.frombuffer(s, dtype=np.uint8)).tobytes()
+    return bytes(sorted(s))
+
+def score_batch(batch, rk, tau, band):
+    # Columns (g, a, c, r, k, score, status) with one row per probe (KINDS order
+    # within each input row) for a list of parsed (R, C, P) rows and their (r, k)
+    # pairs from probe_rk; status holds STATUS_NAMES indices. g/a/c are pure
+    # length arithmetic and run column-wise when NumPy is present.
+    r = [x[0] for x in rk]
+    k = [x[1] for x in rk]
+
+    if np is None:
+        gac = []
+        for R, C, P in batch:
+            gac += probe_gac(R, C, P)
+        g = [x[0] for x in gac]
+        a = [x[1] for x in gac]
+        c = [x[2] for x in gac]
+        score = [(gi + ai + ci + ri + ki) / 5.0 for gi, ai, ci, ri, ki in zip(g, a, c, r, k)]
+        return g, a, c, r, k, score, [STATUS_CODE[gate(f, tau, band)] for f in score]
+
+    # Per-row columns as in probe_gac, interleaved into KINDS order by ravel().
+    len_r = np.array([len(t[0]) for t in batch], dtype=np.float64)
+    len_c = np.array([len(t[1]) for t in batch], dtype=np.float64)
+    len_p = np.array([len(t[2]) for t in batch], dtype=np.float64)
+    g = np.clip(len_c / np.maximum(len_r, 1.0), 0.0, 1.0)
+    a = np.clip(len_p / np.maximum(len_r, 1.0), 0.0, 1.0)
+    c = np.clip(len_c / np.maximum(len_r + len_p, 1.0), 0.0, 1.0)
+    g_sw = np.clip(len_c / np.maximum(len_p, 1.0), 0.0, 1.0)
+    a_sw = np.clip(len_r / np.maximum(len_p, 1.0), 0.0, 1.0)
+    a_id = (len_r > 0).astype(np.float64)
+    c_id = np.clip(len_c / np.maximum(len_r + len_r, 1.0), 0.0, 1.0)
+    zero = np.zeros_like(g)
+    g = np.column_stack((g, g_sw, g, g, zero)).ravel()
+    a = np.column_stack((a, a_sw, a, a_id, a)).ravel()
+    c = np.column_stack((c, c, c, c_id, zero)).ravel()
+
+    r_arr = np.array(r, dtype=np.float64)
+    k_arr = np.array(k, dtype=np.float64)
+    score = (g + a + c + r_arr + k_arr) / 5.0
+    # ALLOW is tested first in gate(), so it also wins when band <= 0
+    allow = score >= tau + band
+    status = allow.astype(np.uint8) + (allow | (score > tau - band))
+    return g.tolist(), a.tolist(), c.tolist(), r, k, score.tolist(), status.tolist()
+
+def score_rows(batch, tau, band):
+    # batch: list of parsed (R, C, P); each yields one row per probe kind.
+    # Returns (evidence lines, counts); counts is a flat kind x status table
+    # indexed KINDS.index(kind) * 3 + status code. Batches are independent, so
+    # they can be scored in worker processes and merged in input order.
+    rk = []
+    for R, C, P in batch:
+        rk += probe_rk(R, C, P, sorted_bytes(R))
+    g, a, c, r, k, score, status = score_batch(batch, rk, tau, band)
+    rows = []
+    counts = [0] * (len(KINDS) * 3)
+    for j in range(len(rk)):
+        ki = j % len(KINDS)
+        st = status[j]
+        counts[ki * 3 + st] += 1
+        rows.append(format_row(KINDS[ki], g[j], a[j], c[j], r[j], k[j], score[j], STATUS_NAMES[st]))
+    return rows, counts
+
+def write_batches(batches, args, ex, counts, out):
+    # Score a window of batches (across workers when ex is set); map() keeps input order.
+    mapper = map if ex is None else ex.map
+    for rows, batch_counts in mapper(score_rows, batches, repeat(args.tau), repeat(args.band)):
+        counts[:] = map(add, counts, batch_counts)
+        out.writelines(rows)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -129,87 +251,69 @@ def main():
     ap.add_argument("--band", type=float, default=0.05)
     ap.add_argument("--out_csv", required=True)
     ap.add_argument("--out_summary", required=True)
+    ap.add_argument("--jobs", type=int, default=1, help="worker processes for scoring batches")
     args = ap.parse_args()
 
-    counts = defaultdict(int)
+    if args.jobs < 1:
+        raise ValueError("--jobs must be >= 1")
+
+    counts = [0] * (len(KINDS) * 3)
     seen = 0
     parsed = 0
 
-    with open(args.rsmi, "r", encoding="utf-8", errors="ignore") as f, \
-         open(args.out_csv, "w", newline="", encoding="utf-8") as out:
-
-        writer = csv.writer(out)
-        writer.writerow(["kind", "g", "a", "c", "r", "k", "score", "status"])
-
-        for line in f:
-            if seen >= args.max_lines:
-                break
-            seen += 1
-            if args.every_k > 1 and (seen % args.every_k != 0):
-                continue
-
-            parsed_line = parse_rsmi_line(line)
-            if not parsed_line:
-                continue
-            R, C, P = parsed_line
-            parsed += 1
-
-            # REAL
-            g, a, c = compute_gac(R, C, P)
-            r, k = compute_rk(R, C, P)
-            score = (g + a + c + r + k) / 5.0
-            status = gate(score, args.tau, args.band)
-            counts[("REAL", status)] += 1
-            write_row(writer, "REAL", g, a, c, r, k, score, status)
-
-            # SWAP (probe: direction should change r)
-            g2, a2, c2 = compute_gac(P, C, R)  # keep same style for consistency
-            r2, k2 = compute_rk(P, C, R)
-            score2 = (g2 + a2 + c2 + r2 + k2) / 5.0
-            status2 = gate(score2, args.tau, args.band)
-            counts[("SWAP", status2)] += 1
-            write_row(writer, "SWAP", g2, a2, c2, r2, k2, score2, status2)
-
-            # SHUFFLE (probe: coherence should change k)
-            Rsh = "".join(sorted(R))
-            g3, a3, c3 = compute_gac(Rsh, C, P)
-            r3, k3 = compute_rk(Rsh, C, P)
-            score3 = (g3 + a3 + c3 + r3 + k3) / 5.0
-            status3 = gate(score3, args.tau, args.band)
-            counts[("SHUFFLE", status3)] += 1
-            write_row(writer, "SHUFFLE", g3, a3, c3, r3, k3, score3, status3)
-
-            # IDENTITY (true negative: P := R)
-            g4, a4, c4 = compute_gac(R, C, R)
-            r4, k4 = compute_rk(R, C, R)
-            score4 = (g4 + a4 + c4 + r4 + k4) / 5.0
-            status4 = gate(score4, args.tau, args.band)
-            counts[("IDENTITY", status4)] += 1
-            write_row(writer, "IDENTITY", g4, a4, c4, r4, k4, score4, status4)
-
-            # STRIP_CONTEXT (stress negative: C := "")
-            g5, a5, c5 = compute_gac(R, "", P)
-            r5, k5 = compute_rk(R, "", P)
-            score5 = (g5 + a5 + c5 + r5 + k5) / 5.0
-            status5 = gate(score5, args.tau, args.band)
-            counts[("STRIP_CTX", status5)] += 1
-            write_row(writer, "STRIP_CTX", g5, a5, c5, r5, k5, score5, status5)
+    ex = ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+    window = 2 * args.jobs
+
+    try:
+        with open(args.rsmi, "rb", buffering=1 << 20) as f, \
+             open(args.out_csv, "w", newline="", encoding="utf-8", buffering=1 << 20) as out:
+
+            out.write("kind,g,a,c,r,k,score,status\r\n")
+
+            batch = []
+            pending = []
+
+            for line in iter_lines(f):
+                if seen >= args.max_lines:
+                    break
+                seen += 1
+                if args.every_k > 1 and (seen % args.every_k != 0):
+                    continue
+
+                parsed_line = parse_rsmi_line(line)
+                if not parsed_line:
+                    continue
+                parsed += 1
+                batch.append(parsed_line)
+                if len(batch) >= BATCH_ROWS:
+                    pending.append(batch)
+                    batch = []
+                    if len(pending) >= window:
+                        write_batches(pending, args, ex, counts, out)
+                        pending = []
+
+            if batch:
+                pending.append(batch)
+            write_batches(pending, args, ex, counts, out)
+    finally:
+        if ex is not None:
+            ex.shutdown()
 
     # Write summary
     with open(args.out_summary, "w", newline="", encoding="utf-8") as sf:
         w = csv.writer(sf)
         w.writerow(["kind", "status", "count"])
-        for kind in ["REAL", "SWAP", "SHUFFLE", "IDENTITY", "STRIP_CTX"]:
+        for ki, kind in enumerate(KINDS):
             for st in ["ALLOW", "ABSTAIN", "DENY"]:
-                w.writerow([kind, st, counts[(kind, st)]])
+                w.writerow([kind, st, counts[ki * 3 + STATUS_CODE[st]]])
 
     # Print compact console summary
     print("SSTS Phase 4A.3 complete")
     print("--------------------------------")
     print(f"seen={seen}, parsed={parsed}, every_k={args.every_k}")
     print(f"gate: tau={args.tau:.3f}, band={args.band:.3f}")
-    for kind in ["REAL", "SWAP", "SHUFFLE", "IDENTITY", "STRIP_CTX"]:
-        d = {st: counts[(kind, st)] for st in ["ALLOW", "ABSTAIN", "DENY"]}
+    for ki, kind in enumerate(KINDS):
+        d = {st: counts[ki * 3 + STATUS_CODE[st]] for st in ["ALLOW", "ABSTAIN", "DENY"]}
         print(kind, d)
 
 if __name__ == "__main__":
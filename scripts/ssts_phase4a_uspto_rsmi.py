@@ -28,56 +28,43 @@ from __future__ import annotations
 import argparse
 import csv
 import hashlib
-import os
-from dataclasses import dataclass
-from typing import Dict, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from operator import add
+from typing import BinaryIO, Dict, Iterator, List, Tuple
 
+from ssts_core import GateParams, clamp01, ensure_parent_dir, safe_float, safe_int, structural_score
 
-# --------------------
-# Utility / safety
-# --------------------
-def safe_int(x: str) -> int:
-    try:
-        return int(x)
-    except Exception as e:
-        raise ValueError(f"Invalid int: {x}") from e
+BATCH_LINES = 10000  # input lines per scoring batch (one worker task with --jobs)
 
+# baseline threshold (fixed, deterministic)
+BASE_THR = 0.55
 
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
+# Confusion-count cells, in summary order. Batches tally into flat lists laid
+# out as <class>_real, <class>_not pairs, so a cell is class offset + (1 - real).
+SSTS_KEYS = ("ALLOW_real", "ALLOW_not", "ABSTAIN_real", "ABSTAIN_not", "DENY_real", "DENY_not")
+BASE_KEYS = ("HIGH_real", "HIGH_not", "LOW_real", "LOW_not")
+SSTS_OFFSET = {"ALLOW": 0, "ABSTAIN": 2, "DENY": 4}
+BASE_OFFSET = {"HIGH": 0, "LOW": 2}
 
 
-def sha256_str(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8", errors="replace")).hexdigest()
+# --------------------
+# Utility / safety
+# --------------------
+def sha256_16(s: str) -> str:
+    # First 16 hex chars of the SHA-256 hexdigest, from the first 8 digest bytes
+    return hashlib.sha256(s.encode("utf-8", errors="replace")).digest()[:8].hex()
 
 
-def clamp01(v: float) -> float:
-    if v < 0.0:
-        return 0.0
-    if v > 1.0:
-        return 1.0
-    return v
+def evidence_text(b: bytes) -> str:
+    # An evidence cell as the text-mode reader produced it: decoded with
+    # errors="replace", stripped and cut at 5000 characters (not bytes).
+    return b.decode("utf-8", errors="replace").strip()[:5000]
 
 
 # --------------------
 # Gate definition
 # --------------------
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.35
-    wc: float = 0.20
-    tau: float = 0.62
-    band: float = 0.05
-
-
-def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
-    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
-
-
 def gate_status(score: float, p: GateParams) -> str:
     low = p.tau - p.band
     high = p.tau + p.band
@@ -91,40 +78,53 @@ def gate_status(score: float, p: GateParams) -> str:
 # --------------------
 # RSMI parsing
 # --------------------
-def split_reaction(line: str) -> Tuple[str, str, str]:
+def iter_lines(f: BinaryIO) -> Iterator[bytes]:
+    # Byte lines split as text mode's universal newlines did: LF, CRLF and a lone
+    # CR all end a line (a CR-only file arrives as one chunk and is split here).
+    for line in f:
+        if b"\r" in line:
+            yield from line.splitlines()
+        else:
+            yield line
+
+
+def split_reaction(line: bytes) -> Tuple[bytes, bytes, bytes]:
     """
-    Returns (reactants, reagents, products) as raw strings.
+    Returns (reactants, reagents, products) as raw bytes.
+
+    RSMI is ASCII, so lines are parsed as bytes without decoding; only the
+    sampled lines are decoded, for their rid hash and evidence fields.
 
     Supports:
       reactants>reagents>products
       reactants>>products  (reagents empty)
 
     Conservative behavior:
-      - If parsing fails, returns ("","","").
+      - If parsing fails, returns (b"",b"",b"").
       - Does not attempt to interpret chemistry or validate SMILES.
     """
     s = line.strip()
     if not s:
-        return "", "", ""
+        return b"", b"", b""
 
     # reactants >> products
-    if ">>" in s:
-        parts = s.split(">>")
+    if b">>" in s:
+        parts = s.split(b">>")
         if len(parts) != 2:
-            return "", "", ""
-        return parts[0].strip(), "", parts[1].strip()
+            return b"", b"", b""
+        return parts[0].strip(), b"", parts[1].strip()
 
     # reactants > reagents > products (most common)
-    parts = s.split(">")
+    parts = s.split(b">")
     if len(parts) < 3:
-        return "", "", ""
+        return b"", b"", b""
     reactants = parts[0].strip()
     reagents = parts[1].strip()
-    products = ">".join(parts[2:]).strip()  # preserve if extra '>' appear later
+    products = b">".join(parts[2:]).strip()  # preserve if extra '>' appear later
     return reactants, reagents, products
 
 
-def canonical_side(side: str) -> str:
+def canonical_side(side: bytes) -> bytes:
     """
     Conservative canonicalization:
       - remove whitespace
@@ -132,18 +132,41 @@ def canonical_side(side: str) -> str:
 
     This does NOT claim chemical equivalence; only stable string identity.
     """
-    t = side.replace(" ", "")
-    if not t:
-        return ""
-    frags = [f for f in t.split(".") if f]
+    t = side.replace(b" ", b"")
+    if b"." not in t:
+        return t  # empty or a single fragment
+    frags = t.split(b".")
     frags.sort()
-    return ".".join(frags)
+    if not frags[0]:
+        # empty fragments sort first; drop them only when present
+        frags = [f for f in frags if f]
+    return b".".join(frags)
 
 
 # --------------------
 # Proxy extraction
 # --------------------
-def token_counts(s: str) -> Dict[str, int]:
+# Marker characters per token_counts category. Each marker byte is translated to
+# its category code (b"0".."6" in this order) and every other byte is deleted,
+# so a single translate() pass leaves a short string of category codes.
+TOKEN_MARKERS = {
+    "rings": "12345",
+    "branches": "()",
+    "charges": "+-",
+    "brackets": "[]",
+    "aromatic": "cnos",
+    "double": "=",
+    "triple": "#",
+    # "halogens": intentionally omitted (see token_counts docstring)
+}
+_MARKER_BYTES = "".join(TOKEN_MARKERS.values()).encode("ascii")
+_MARKER_CODES = b"".join(str(i).encode("ascii") * len(m) for i, m in enumerate(TOKEN_MARKERS.values()))
+_MARKER_TABLE = bytes.maketrans(_MARKER_BYTES, _MARKER_CODES)
+_NON_MARKERS = bytes(b for b in range(256) if b not in _MARKER_BYTES)
+_CATEGORY_CODES = tuple(str(i).encode("ascii") for i in range(len(TOKEN_MARKERS)))
+
+
+def token_counts(s: bytes) -> Dict[str, int]:
     """
     Count simple structural markers in SMILES-like strings.
 
@@ -155,30 +178,23 @@ def token_counts(s: str) -> Dict[str, int]:
       are ambiguous as raw character counts. If halogens are needed later,
       add an explicit deterministic scanner.
     """
-    return {
-        "len": len(s),
-        "rings": s.count("1") + s.count("2") + s.count("3") + s.count("4") + s.count("5"),
-        "branches": s.count("(") + s.count(")"),
-        "charges": s.count("+") + s.count("-"),
-        "brackets": s.count("[") + s.count("]"),
-        "aromatic": s.count("c") + s.count("n") + s.count("o") + s.count("s"),
-        "double": s.count("="),
-        "triple": s.count("#"),
-        # "halogens": intentionally omitted (see docstring)
-    }
-
-
-def proxy_g_alignment(reactants: str, products: str) -> float:
+    codes = s.translate(_MARKER_TABLE, _NON_MARKERS)
+    counts = {"len": len(s)}
+    for name, code in zip(TOKEN_MARKERS, _CATEGORY_CODES):
+        counts[name] = codes.count(code)
+    return counts
+
+
+def proxy_g_alignment(r: bytes, p: bytes) -> float:
     """
     g: alignment proxy
     Higher when there is a clear non-trivial transformation signature.
     Based on fragment count change + length change.
-    """
-    r = canonical_side(reactants)
-    p = canonical_side(products)
 
-    rf = 0 if not r else len(r.split("."))
-    pf = 0 if not p else len(p.split("."))
+    r, p are the canonical_side() forms of reactants and products.
+    """
+    rf = 0 if not r else len(r.split(b"."))
+    pf = 0 if not p else len(p.split(b"."))
 
     len_r = len(r)
     len_p = len(p)
@@ -195,19 +211,16 @@ def proxy_g_alignment(reactants: str, products: str) -> float:
     return clamp01(g)
 
 
-def proxy_a_internal_access(reactants: str, products: str) -> float:
+def proxy_a_internal_access(cr: Dict[str, int], cp: Dict[str, int]) -> float:
     """
     a: internal access proxy
     Higher when internal structural markers shift (rings, bond orders, charges).
+
+    cr, cp are token_counts() of the canonical reactants and products.
     """
-    r = canonical_side(reactants)
-    p = canonical_side(products)
-    if not r or not p:
+    if not cr["len"] or not cp["len"]:
         return 0.0
 
-    cr = token_counts(r)
-    cp = token_counts(p)
-
     keys = ["rings", "double", "triple", "charges", "brackets", "branches", "aromatic"]
     diffs = 0.0
     for k in keys:
@@ -217,37 +230,37 @@ def proxy_a_internal_access(reactants: str, products: str) -> float:
     return a_int
 
 
-def proxy_c_context(reagents: str) -> float:
+def proxy_c_context(t: bytes) -> float:
     """
     c: context proxy
     Higher when there is explicit reagent/context content.
     Uses length + fragment count as a conservative proxy.
+
+    t is the canonical_side() form of the reagents.
     """
-    t = canonical_side(reagents)
     if not t:
         return 0.0
-    frags = len(t.split(".")) if t else 0
+    frags = len(t.split(b".")) if t else 0
     len_term = clamp01(len(t) / 120.0)
     frag_term = clamp01(frags / 6.0)
     c = 0.55 * len_term + 0.45 * frag_term
     return clamp01(c)
 
 
-def proxy_energy_baseline(reactants: str, reagents: str, products: str) -> float:
+def proxy_energy_baseline(cr: Dict[str, int], cg: Dict[str, int], cp: Dict[str, int]) -> float:
     """
     Energy-only baseline proxy (string-based):
     Interprets "energy present" as 'complexity high' in any part of record.
     This is intentionally weak and generic, to mimic the common mistake:
       "high energy/complexity implies chemistry"
+
+    cr, cg, cp are token_counts() of the canonical reactants, reagents, products.
+    Counts are per character, so the counts of r + g + p are their sums.
     """
-    r = canonical_side(reactants)
-    g = canonical_side(reagents)
-    p = canonical_side(products)
-    s = r + g + p
-    if not s:
+    cnt = {k: cr[k] + cg[k] + cp[k] for k in cr}
+    if not cnt["len"]:
         return 0.0
 
-    cnt = token_counts(s)
     complexity = (
         0.30 * clamp01(cnt["len"] / 250.0) +
         0.20 * clamp01(cnt["rings"] / 10.0) +
@@ -258,6 +271,79 @@ def proxy_energy_baseline(reactants: str, reagents: str, products: str) -> float
     return clamp01(complexity)
 
 
+# --------------------
+# Line batches
+# --------------------
+LineBatch = List[Tuple[int, bytes]]
+BatchResult = Tuple[List[Dict[str, str]], List[int], List[int], int, int]
+
+
+def score_lines(lines: LineBatch, p: GateParams, every_k: int) -> BatchResult:
+    """
+    Score a batch of (line_idx, raw line) pairs.
+
+    Returns (evidence rows for the sampled lines, SSTS count deltas,
+    baseline count deltas, parsed, skipped). The deltas are flat lists laid
+    out as SSTS_KEYS / BASE_KEYS. Lines are independent, so batches can be
+    scored in any process and merged in input order.
+    """
+    rows: List[Dict[str, str]] = []
+    ssts_delta = [0] * len(SSTS_KEYS)
+    base_delta = [0] * len(BASE_KEYS)
+    parsed = 0
+    skipped = 0
+
+    for idx, line in lines:
+        reactants, reagents, products = split_reaction(line)
+        if not reactants and not products:
+            skipped += 1
+            continue
+
+        # canonicalize and count each side once; the proxies take these
+        cr = canonical_side(reactants)
+        crg = canonical_side(reagents)
+        cp = canonical_side(products)
+        reaction_is_real = 1 if (cr and cp and cr != cp) else 0
+
+        tc_r = token_counts(cr)
+        tc_g = token_counts(crg)
+        tc_p = token_counts(cp)
+
+        g = proxy_g_alignment(cr, cp)
+        a_int = proxy_a_internal_access(tc_r, tc_p)
+        c = proxy_c_context(crg)
+        score = structural_score(g, a_int, c, p)
+        status = gate_status(score, p)
+
+        base = proxy_energy_baseline(tc_r, tc_g, tc_p)
+        base_class = "HIGH" if base >= BASE_THR else "LOW"
+
+        ssts_delta[SSTS_OFFSET[status] + 1 - reaction_is_real] += 1
+        base_delta[BASE_OFFSET[base_class] + 1 - reaction_is_real] += 1
+
+        parsed += 1
+
+        if every_k <= 1 or (idx % every_k == 0):
+            rid = sha256_16(line.decode("utf-8", errors="replace").strip())
+            rows.append({
+                "line_idx": str(idx),
+                "rid_sha16": rid,
+                "reactants": evidence_text(reactants),
+                "reagents": evidence_text(reagents),
+                "products": evidence_text(products),
+                "g": f"{g:.6f}",
+                "a": f"{a_int:.6f}",
+                "c": f"{c:.6f}",
+                "score": f"{score:.6f}",
+                "status": status,
+                "baseline_energy": f"{base:.6f}",
+                "baseline_class": base_class,
+                "reaction_is_real": str(reaction_is_real),
+            })
+
+    return rows, ssts_delta, base_delta, parsed, skipped
+
+
 # --------------------
 # Main run
 # --------------------
@@ -270,31 +356,30 @@ def main() -> int:
     ap.add_argument("--every_k", type=safe_int, default=20, help="Write 1 evidence row per K lines (sampling)")
     ap.add_argument("--tau", type=safe_float, default=0.62)
     ap.add_argument("--band", type=safe_float, default=0.05)
+    ap.add_argument("--sample_stats", action="store_true",
+                    help="Count only the every_k-sampled lines; the rest are not parsed (fast path)")
+    ap.add_argument("--jobs", type=safe_int, default=1, help="Worker processes for scoring line batches")
     args = ap.parse_args()
 
-    p = GateParams(tau=args.tau, band=args.band)
+    if args.jobs < 1:
+        raise ValueError("--jobs must be >= 1")
 
-    os.makedirs(os.path.dirname(args.out_csv), exist_ok=True) if os.path.dirname(args.out_csv) else None
-    os.makedirs(os.path.dirname(args.out_summary), exist_ok=True) if os.path.dirname(args.out_summary) else None
+    p = GateParams(tau=args.tau, band=args.band)
 
-    # confusion-like counts for SSTS vs label (reaction_is_real)
-    ssts_counts = {
-        "ALLOW_real": 0, "ALLOW_not": 0,
-        "ABSTAIN_real": 0, "ABSTAIN_not": 0,
-        "DENY_real": 0, "DENY_not": 0,
-    }
-    # baseline: threshold classify "energy_high" vs label
-    base_counts = {"HIGH_real": 0, "HIGH_not": 0, "LOW_real": 0, "LOW_not": 0}
+    ensure_parent_dir(args.out_csv)
+    ensure_parent_dir(args.out_summary)
 
-    # baseline threshold (fixed, deterministic)
-    base_thr = 0.55
+    # confusion-like counts for SSTS vs label (reaction_is_real), per SSTS_KEYS
+    ssts_tally = [0] * len(SSTS_KEYS)
+    # baseline: threshold classify "energy_high" vs label, per BASE_KEYS
+    base_tally = [0] * len(BASE_KEYS)
 
     total = 0
     parsed = 0
     skipped = 0
     evidence_written = 0
 
-    with open(args.out_csv, "w", newline="", encoding="utf-8") as fout:
+    with open(args.out_csv, "w", newline="", encoding="utf-8", buffering=1 << 20) as fout:
         fieldnames = [
             "line_idx", "rid_sha16",
             "reactants", "reagents", "products",
@@ -305,56 +390,56 @@ def main() -> int:
         w = csv.DictWriter(fout, fieldnames=fieldnames)
         w.writeheader()
 
-        with open(args.rsmi, "r", encoding="utf-8", errors="replace") as f:
-            for idx, line in enumerate(f):
-                if args.max_lines > 0 and idx >= args.max_lines:
-                    break
-                total += 1
-
-                reactants, reagents, products = split_reaction(line)
-                if not reactants and not products:
-                    skipped += 1
-                    continue
-
-                cr = canonical_side(reactants)
-                cp = canonical_side(products)
-                reaction_is_real = 1 if (cr and cp and cr != cp) else 0
-
-                g = proxy_g_alignment(reactants, products)
-                a_int = proxy_a_internal_access(reactants, products)
-                c = proxy_c_context(reagents)
-                score = structural_score(g, a_int, c, p)
-                status = gate_status(score, p)
-
-                base = proxy_energy_baseline(reactants, reagents, products)
-                base_class = "HIGH" if base >= base_thr else "LOW"
-
-                key = f"{status}_{'real' if reaction_is_real == 1 else 'not'}"
-                ssts_counts[key] += 1
-
-                bkey = f"{base_class}_{'real' if reaction_is_real == 1 else 'not'}"
-                base_counts[bkey] += 1
-
-                parsed += 1
-
-                if args.every_k <= 1 or (idx % args.every_k == 0):
-                    rid = sha256_str(line.strip())[:16]
-                    w.writerow({
-                        "line_idx": str(idx),
-                        "rid_sha16": rid,
-                        "reactants": reactants[:5000],
-                        "reagents": reagents[:5000],
-                        "products": products[:5000],
-                        "g": f"{g:.6f}",
-                        "a": f"{a_int:.6f}",
-                        "c": f"{c:.6f}",
-                        "score": f"{score:.6f}",
-                        "status": status,
-                        "baseline_energy": f"{base:.6f}",
-                        "baseline_class": base_class,
-                        "reaction_is_real": str(reaction_is_real),
-                    })
-                    evidence_written += 1
+        # Batches are scored by map() (serially, or across --jobs workers) a window
+        # at a time; results come back in input order, so output is identical.
+        ex = ProcessPoolExecutor(max_workers=args.jobs) if args.jobs > 1 else None
+        window = 2 * args.jobs
+
+        def run_window(batches: List[LineBatch]) -> None:
+            nonlocal parsed, skipped, evidence_written
+            mapper = map if ex is None else ex.map
+            for rows, ssts_delta, base_delta, n_parsed, n_skipped in mapper(
+                score_lines, batches, repeat(p), repeat(args.every_k)
+            ):
+                ssts_tally[:] = map(add, ssts_tally, ssts_delta)
+                base_tally[:] = map(add, base_tally, base_delta)
+                parsed += n_parsed
+                skipped += n_skipped
+                evidence_written += len(rows)
+                w.writerows(rows)
+
+        try:
+            batch: LineBatch = []
+            pending: List[LineBatch] = []
+            with open(args.rsmi, "rb", buffering=1 << 20) as f:
+                for idx, line in enumerate(iter_lines(f)):
+                    if args.max_lines > 0 and idx >= args.max_lines:
+                        break
+                    total += 1
+
+                    # Counts normally cover every line, so every line is parsed and scored;
+                    # only the evidence row is sampled. --sample_stats restricts both to
+                    # the sampled lines and skips the others before any parsing.
+                    if args.sample_stats and not (args.every_k <= 1 or idx % args.every_k == 0):
+                        continue
+
+                    batch.append((idx, line))
+                    if len(batch) >= BATCH_LINES:
+                        pending.append(batch)
+                        batch = []
+                        if len(pending) >= window:
+                            run_window(pending)
+                            pending = []
+
+            if batch:
+                pending.append(batch)
+            run_window(pending)
+        finally:
+            if ex is not None:
+                ex.shutdown()
+
+    ssts_counts = dict(zip(SSTS_KEYS, ssts_tally))
+    base_counts = dict(zip(BASE_KEYS, base_tally))
 
     with open(args.out_summary, "w", newline="", encoding="utf-8") as fs:
         fieldnames = [
@@ -382,7 +467,7 @@ def main() -> int:
             "parsed": str(parsed),
             "skipped": str(skipped),
             "evidence_rows_written": str(evidence_written),
-            "baseline_thr": f"{base_thr:.2f}",
+            "baseline_thr": f"{BASE_THR:.2f}",
         }
         row.update({k: str(v) for k, v in ssts_counts.items()})
         row.update({k: str(v) for k, v in base_counts.items()})
@@ -393,6 +478,8 @@ def main() -> int:
     print(f"Input: {args.rsmi}")
     print(f"Gate: tau={args.tau:.3f}, band={args.band:.3f}")
     print(f"Processed: total_seen={total}, parsed={parsed}, skipped={skipped}")
+    if args.sample_stats:
+        print(f"Counts cover sampled lines only (every_k={args.every_k})")
     print(f"Evidence rows written (sampled): {evidence_written} -> {args.out_csv}")
     print(f"Summary written: {args.out_summary}")
     print("")
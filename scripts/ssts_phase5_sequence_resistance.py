@@ -23,37 +23,19 @@ This does NOT change classical physics/chemistry — it is a structural posture
 from __future__ import annotations
 
 import argparse
-import csv
-import os
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
+from ssts_core import STATUS_NAMES, GateParams, gate_rank, safe_float, structural_score, write_lines_csv
 
-def clamp01(x: float) -> float:
-    return 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
+FIELDNAMES = (
+    "sequence", "t", "g", "a_int", "c", "score",
+    "s_before", "s_after", "effective_score", "tau", "band", "status", "r_risk",
+)
 
-
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
-
-
-def safe_int(x: str) -> int:
-    try:
-        return int(x)
-    except Exception as e:
-        raise ValueError(f"Invalid int: {x}") from e
-
-
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.35
-    wc: float = 0.20
-    tau: float = 0.62
-    band: float = 0.05
+# One C-level %-format per evidence row; same text as the "%.6f" cells csv wrote
+# (CRLF rows, no field ever needs quoting).
+ROW_FMT = "%s,%d,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%s,%.6f\r\n"
 
 
 @dataclass(frozen=True)
@@ -64,86 +46,75 @@ class ResistanceParams:
     k_allow: float = 0.30    # s *= (1 - k_allow) on ALLOW
 
 
-def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
-    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
-
-
 def risk_proxy(score: float, p: GateParams) -> float:
     return max(0.0, p.tau - score)
 
 
-def gate_status(score: float, p: GateParams) -> str:
-    low = p.tau - p.band
-    high = p.tau + p.band
-    if score < low:
-        return "DENY"
-    if score <= high:
-        return "ABSTAIN"
-    return "ALLOW"
-
+# (score, s_before, s_after, effective_score, status, r_risk) for one step
+Step = Tuple[float, float, float, float, str, float]
 
-def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True) if os.path.dirname(path) else None
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
 
-
-def run_sequence(
-    seq_name: str,
+def resistance_trace(
     seq: List[Tuple[float, float, float]],
     gp: GateParams,
     rp: ResistanceParams
-) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
+) -> List[Step]:
+    # The numeric recurrence only; run_sequence formats the evidence rows.
+    # The sequences are a handful of steps, so this stays plain Python: a JIT
+    # import alone would cost more than the whole run.
+    steps: List[Step] = []
+    alpha = rp.alpha
+    k_deny = rp.k_deny
+    k_abstain = rp.k_abstain
+    decay = 1.0 - rp.k_allow
+    low = gp.tau - gp.band
+    high = gp.tau + gp.band
     s = 0.0
 
-    for t, (g, a_int, c) in enumerate(seq, start=1):
+    for g, a_int, c in seq:
         s_before = s
 
         score = structural_score(g, a_int, c, gp)
-        eff = score - (rp.alpha * s_before)
-        st = gate_status(eff, gp)
+        eff = score - (alpha * s_before)
+        rank = gate_rank(eff, low, high)
         r = risk_proxy(eff, gp)
 
         # update s deterministically (and auditably)
-        if st == "DENY":
-            s_after = s_before + (rp.k_deny * r)
-        elif st == "ABSTAIN":
-            s_after = s_before + (rp.k_abstain * r)
+        if rank == 0:  # DENY
+            s_after = s_before + (k_deny * r)
+        elif rank == 1:  # ABSTAIN
+            s_after = s_before + (k_abstain * r)
         else:
-            s_after = s_before * (1.0 - rp.k_allow)
+            s_after = s_before * decay
 
         s = s_after
+        steps.append((score, s_before, s_after, eff, STATUS_NAMES[rank], r))
+
+    return steps
+
+
+def run_sequence(
+    seq_name: str,
+    seq: List[Tuple[float, float, float]],
+    gp: GateParams,
+    rp: ResistanceParams
+) -> Tuple[List[str], Step]:
+    # Evidence lines (FIELDNAMES order) and the final step for the console summary.
+    steps = resistance_trace(seq, gp, rp)
+    lines = [
+        ROW_FMT % (seq_name, t, g, a_int, c, score, s_before, s_after, eff, gp.tau, gp.band, st, r)
+        for t, ((g, a_int, c), (score, s_before, s_after, eff, st, r)) in enumerate(zip(seq, steps), start=1)
+    ]
+    return lines, steps[-1]
+
 
-        rows.append({
-            "sequence": seq_name,
-            "t": str(t),
-            "g": f"{g:.6f}",
-            "a_int": f"{a_int:.6f}",
-            "c": f"{c:.6f}",
-            "score": f"{score:.6f}",
-            "s_before": f"{s_before:.6f}",
-            "s_after": f"{s_after:.6f}",
-            "effective_score": f"{eff:.6f}",
-            "tau": f"{gp.tau:.6f}",
-            "band": f"{gp.band:.6f}",
-            "status": st,
-            "r_risk": f"{r:.6f}",
-        })
-
-    return rows
-
-
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="SSTS Phase 5 sequence resistance proof")
     ap.add_argument("--tau", type=safe_float, default=0.62)
     ap.add_argument("--band", type=safe_float, default=0.05)
     ap.add_argument("--alpha", type=safe_float, default=0.40)
     ap.add_argument("--out_csv", type=str, default="outputs/ssts_phase5_sequence_resistance.csv")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     gp = GateParams(tau=args.tau, band=args.band)
     rp = ResistanceParams(alpha=args.alpha)
@@ -167,23 +138,21 @@ def main() -> int:
         (0.62, 0.62, 0.62),  # same endpoint
     ]
 
-    rows: List[Dict[str, str]] = []
-    rows += run_sequence("A_fatigue_path", seq_A, gp, rp)
-    rows += run_sequence("B_clean_path", seq_B, gp, rp)
+    rows_A, lastA = run_sequence("A_fatigue_path", seq_A, gp, rp)
+    rows_B, lastB = run_sequence("B_clean_path", seq_B, gp, rp)
 
-    write_csv(args.out_csv, rows)
+    write_lines_csv(args.out_csv, FIELDNAMES, rows_A + rows_B)
 
-    # Console summary: last status for each path (use s_after for clarity)
-    lastA = [r for r in rows if r["sequence"] == "A_fatigue_path"][-1]
-    lastB = [r for r in rows if r["sequence"] == "B_clean_path"][-1]
+    # Console summary: last status for each path (use s_after for clarity);
+    # lastA/lastB are (score, s_before, s_after, eff, status, r) steps
 
     print("SSTS Phase 5 — Sequence / resistance proof")
     print("------------------------------------------")
     print(f"Gate: tau={gp.tau:.3f}, band={gp.band:.3f}, effective_score = score - alpha*s with alpha={rp.alpha:.3f}")
     print("")
     print("Final step comparison (same endpoint g=a=c=0.62):")
-    print(f"  Path A (fatigue): status={lastA['status']}, s_after={lastA['s_after']}, eff={lastA['effective_score']}")
-    print(f"  Path B (clean):   status={lastB['status']}, s_after={lastB['s_after']}, eff={lastB['effective_score']}")
+    print(f"  Path A (fatigue): status={lastA[4]}, s_after={lastA[2]:.6f}, eff={lastA[3]:.6f}")
+    print(f"  Path B (clean):   status={lastB[4]}, s_after={lastB[2]:.6f}, eff={lastB[3]:.6f}")
     print("")
     print(f"Wrote evidence CSV: {args.out_csv}")
     return 0
@@ -19,106 +19,53 @@ Notes:
 from __future__ import annotations
 
 import argparse
-import csv
-import os
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from typing import List, Optional, Sequence, Tuple
 
+from ssts_core import STATUS_NAMES, GateParams, clamp01, gate_rank, safe_float, structural_score, write_lines_csv
 
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
+FIELDNAMES = (
+    "sequence_id", "sequence_label", "step_idx", "g", "a", "c", "score",
+    "tau", "band", "status", "risk_r", "resistance_s_placeholder", "note",
+)
 
+# One C-level %-format per evidence row; same text as the "%.6f" cells csv wrote
+# (CRLF rows, no field ever needs quoting).
+ROW_FMT = "%s,%s,%d,%.6f,%.6f,%.6f,%.6f,%.6f,%.6f,%s,%.6f,%.6f,%s\r\n"
 
-def clamp01(x: float) -> float:
-    return 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
-
-
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.275
-    wc: float = 0.275
-    tau: float = 0.62
-    band: float = 0.05
-
-
-def structural_score(g: float, a: float, c: float, p: GateParams) -> float:
-    g = clamp01(g)
-    a = clamp01(a)
-    c = clamp01(c)
-    return (p.wg * g) + (p.wa * a) + (p.wc * c)
-
-
-def gate_status(score: float, p: GateParams) -> str:
-    low = p.tau - p.band
-    high = p.tau + p.band
-    if score < low:
-        return "DENY"
-    if score <= high:
-        return "ABSTAIN"
-    return "ALLOW"
+NOTE = "v2: resistance is placeholder (always 0.0); see Phase 5 v1 for history-dependent resistance"
 
 
 def risk_proxy(score: float, p: GateParams) -> float:
     return max(0.0, p.tau - score)
 
 
-def ensure_parent_dir(path: str) -> None:
-    d = os.path.dirname(path)
-    if d:
-        os.makedirs(d, exist_ok=True)
-
-
-def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
-    ensure_parent_dir(path)
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-
 def run_sequence(
     sequence_id: str,
     label: str,
     seq: List[Tuple[float, float, float]],
     gp: GateParams,
-) -> List[Dict[str, str]]:
-    rows: List[Dict[str, str]] = []
-
+) -> List[str]:
     # v2: resistance is a placeholder (fixed at zero)
     s_placeholder = 0.0
+    low = gp.tau - gp.band
+    high = gp.tau + gp.band
 
+    lines: List[str] = []
     for step_idx, (g, a, c) in enumerate(seq, start=1):
-        score = structural_score(g, a, c, gp)
-        st = gate_status(score, gp)
+        score = structural_score(clamp01(g), clamp01(a), clamp01(c), gp)
+        st = STATUS_NAMES[gate_rank(score, low, high)]
         r = risk_proxy(score, gp)
-
-        rows.append(
-            {
-                "sequence_id": sequence_id,
-                "sequence_label": label,
-                "step_idx": str(step_idx),
-                "g": f"{g:.6f}",
-                "a": f"{a:.6f}",
-                "c": f"{c:.6f}",
-                "score": f"{score:.6f}",
-                "tau": f"{gp.tau:.6f}",
-                "band": f"{gp.band:.6f}",
-                "status": st,
-                "risk_r": f"{r:.6f}",
-                "resistance_s_placeholder": f"{s_placeholder:.6f}",
-                "note": "v2: resistance is placeholder (always 0.0); see Phase 5 v1 for history-dependent resistance",
-            }
+        lines.append(
+            ROW_FMT % (
+                sequence_id, label, step_idx, g, a, c, score,
+                gp.tau, gp.band, st, r, s_placeholder, NOTE,
+            )
         )
 
-    return rows
+    return lines
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="SSTS Phase 5 v2 (deterministic sequence evidence)")
     ap.add_argument("--tau", type=safe_float, default=0.62)
     ap.add_argument("--band", type=safe_float, default=0.05)
@@ -130,7 +77,7 @@ def main() -> int:
         type=str,
         default="outputs/ssts_phase5_sequence_evidence_v2.csv",
     )
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     # normalize weights if user overrides incorrectly
     wsum = args.wg + args.wa + args.wc
@@ -161,12 +108,12 @@ def main() -> int:
         (0.64, 0.61, 0.61),
     ]
 
-    rows: List[Dict[str, str]] = []
+    rows: List[str] = []
     rows += run_sequence("A", "low_mid_approach", seq_A, gp)
     rows += run_sequence("B", "strong_approach", seq_B, gp)
     rows += run_sequence("C", "boundary_climb", seq_C, gp)
 
-    write_csv(args.out_csv, rows)
+    write_lines_csv(args.out_csv, FIELDNAMES, rows)
 
     print("Phase 5 v2 complete.")
     print(f"Evidence written to: {args.out_csv}")
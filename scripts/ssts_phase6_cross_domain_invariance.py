@@ -20,37 +20,41 @@ Gate:
     DENY if score < tau-band
     ABSTAIN if tau-band <= score <= tau+band
     ALLOW if score > tau+band
+
+NumPy is optional: when present each domain cube is evaluated as arrays; the
+stdlib loop is kept as the reference path and produces identical output.
+Numba is optional too: very large grids are then scanned in parallel threads
+(imported on first use, so smaller runs never pay for it).
 """
 
 from __future__ import annotations
 
 import argparse
-import csv
-import os
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import functools
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
 
+from ssts_core import STATUS_NAMES, GateParams, gate_rank, safe_float, safe_int, write_lines_csv
 
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
+FIELDNAMES = (
+    "domain", "grid_n", "points", "tau", "band",
+    "deny", "abstain", "allow", "monotonicity", "violations",
+)
 
-def safe_int(x: str) -> int:
-    try:
-        return int(x)
-    except Exception as e:
-        raise ValueError(f"Invalid int: {x}") from e
+try:
+    import numpy as np
+except ImportError:  # optional accelerator; stdlib scan below is authoritative
+    np = None
 
+# Grid cells evaluated per slab in the NumPy scan (bounds peak memory).
+CHUNK_CELLS = 1 << 20
 
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.35
-    wc: float = 0.20
-    tau: float = 0.62
-    band: float = 0.05
+# Grids with at least this many cells (grid_n >= 323) use the parallel Numba scan
+# when available. Below it the Numba import and cached-kernel load (~0.6s) cost
+# more than the NumPy scan takes. Whole runs, one core, warm cache:
+#   grid_n   200    250    300    350
+#   NumPy    0.27s  0.40s  0.61s  0.92s
+#   Numba    0.60s  0.60s  0.64s  0.73s
+PARALLEL_MIN_CELLS = 1 << 25
 
 
 def grid_values(n: int) -> List[float]:
@@ -60,33 +64,6 @@ def grid_values(n: int) -> List[float]:
     return [i * step for i in range(n)]
 
 
-def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
-    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
-
-
-def gate_status(score: float, p: GateParams) -> str:
-    low = p.tau - p.band
-    high = p.tau + p.band
-    if score < low:
-        return "DENY"
-    if score <= high:
-        return "ABSTAIN"
-    return "ALLOW"
-
-
-def status_rank(st: str) -> int:
-    return {"DENY": 0, "ABSTAIN": 1, "ALLOW": 2}[st]
-
-
-def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True) if os.path.dirname(path) else None
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
-
-
 # -------------------------
 # Domain adapters (internal)
 # -------------------------
@@ -144,13 +121,181 @@ def adapter_materials_yield(stress: float, strain_rate: float, microstructure: f
     return g, a_int, c
 
 
+Adapter = Callable[[float, float, float], Tuple[float, float, float]]
+ScanResult = Tuple[Dict[str, int], int]
+
+
+def scan_python(adapter: Adapter, vals: List[float], p: GateParams) -> ScanResult:
+    grid_n = len(vals)
+    # status ranks in (i1, i2, i3) row-major order, as the NumPy cube lays them out
+    ranks: List[int] = []
+    # GateParams fields read once; the inlined score is structural_score()
+    wg, wa, wc = p.wg, p.wa, p.wc
+    low = p.tau - p.band
+    high = p.tau + p.band
+
+    for d1 in vals:
+        for d2 in vals:
+            for d3 in vals:
+                g, a_int, c = adapter(d1, d2, d3)
+                score = (wg * g) + (wa * a_int) + (wc * c)
+                ranks.append(gate_rank(score, low, high))
+
+    counts = {name: ranks.count(i) for i, name in enumerate(STATUS_NAMES)}
+
+    # monotonicity check under uniform increase of all domain drivers (+1,+1,+1):
+    # that neighbour sits `step` cells further on in the flat list
+    step = grid_n * grid_n + grid_n + 1
+    base = [
+        (i1 * grid_n + i2) * grid_n + i3
+        for i1 in range(grid_n - 1)
+        for i2 in range(grid_n - 1)
+        for i3 in range(grid_n - 1)
+    ]
+    violations = sum(ranks[j + step] < ranks[j] for j in base)
+
+    return counts, violations
+
+
+def scan_numpy(adapter: Adapter, vals: List[float], p: GateParams) -> ScanResult:
+    # Same scan as scan_python, evaluated in (k,n,n) slabs of consecutive d1 values.
+    # The adapters are plain arithmetic, so they broadcast (k,1,1)/(1,n,1)/(1,1,n)
+    # axes elementwise with the same operations (and so the same floats) as the
+    # scalar loop. Small grids are a single slab; large ones never hold the cube.
+    n = len(vals)
+    v = np.asarray(vals, dtype=np.float64)
+    low = p.tau - p.band
+    high = p.tau + p.band
+
+    counts_arr = np.zeros(3, dtype=np.int64)
+    violations = 0
+    prev = None  # rank plane of the last d1 value in the previous slab
+
+    # One score slab and one int8 rank slab, reused for every slab of the scan
+    k = max(1, CHUNK_CELLS // (n * n))
+    score_buf = np.empty((min(k, n), n, n))
+    rank_buf = np.empty((min(k, n), n, n), dtype=np.int8)
+    for i0 in range(0, n, k):
+        d1 = v[i0:i0 + k, None, None]
+        m = d1.shape[0]
+        # Each adapter mixes d1/d2 into g and a and passes d3 through as c, so
+        # wg*g + wa*a is a (k,n,1) plane and the (k,n,n) slab is only touched by
+        # the final + wc*c, written in place. Folding the weights into per-axis
+        # coefficients (A*d1 + B*d2 + ...) would save nothing here and rounds
+        # differently: on the default weights it moves ~25% of the scores by an
+        # ulp, which can flip cells sitting on tau.
+        g, a_int, c = adapter(d1, v[None, :, None], v[None, None, :])
+        score = score_buf[:m]
+        # same evaluation order as structural_score: (wg*g + wa*a) + wc*c
+        np.add((p.wg * g) + (p.wa * a_int), p.wc * c, out=score)
+
+        # rank 0/1/2 = DENY/ABSTAIN/ALLOW as gate_rank (band >= 0 is validated)
+        rank = rank_buf[:m]
+        np.greater_equal(score, low, out=rank, casting="unsafe")
+        rank += score > high
+        counts_arr += np.bincount(rank.ravel(), minlength=3)
+
+        # monotonicity check under uniform increase of all domain drivers (+1,+1,+1),
+        # within the slab and across the boundary with the previous one
+        violations += int(np.count_nonzero(rank[1:, 1:, 1:] < rank[:-1, :-1, :-1]))
+        if prev is not None:
+            violations += int(np.count_nonzero(rank[0, 1:, 1:] < prev[:-1, :-1]))
+        prev = rank[-1].copy()  # rank_buf is overwritten by the next slab
+
+    n_deny, n_abstain, n_allow = counts_arr.tolist()
+    counts = {"DENY": n_deny, "ABSTAIN": n_abstain, "ALLOW": n_allow}
+    return counts, violations
+
+
+def linear_coeffs(adapter: Adapter, v) -> Optional[Tuple[float, float, float, float]]:
+    # (cg1, cg2, ca1, ca2) such that g = cg1*d1 + cg2*d2, a = ca1*d1 + ca2*d2 and
+    # c = d3, read off the adapter itself and checked against it on the whole
+    # (d1, d2) grid, so the kernel cannot drift from the adapter definitions.
+    # None when the adapter is not of that form (the NumPy scan is used then).
+    # A 0.0/1.0 pair reproduces a pass-through exactly (0.0*d1 + 1.0*d2 == d2 for
+    # grid values >= 0), so the kernel gets the same floats as the adapter.
+    cg1, ca1, _ = adapter(1.0, 0.0, 0.0)
+    cg2, ca2, _ = adapter(0.0, 1.0, 0.0)
+    d1 = v[:, None]
+    d2 = v[None, :]
+    g, a_int, c = adapter(d1, d2, v)
+    # compared with broadcasting: a pass-through axis comes back as (1,n) or (n,1)
+    if not ((g == cg1 * d1 + cg2 * d2).all()
+            and (a_int == ca1 * d1 + ca2 * d2).all()
+            and (c == v).all()):
+        return None
+    return cg1, cg2, ca1, ca2
+
+
+@functools.lru_cache(maxsize=None)
+def parallel_kernel():
+    # The parallel scan compiled with Numba, or None without it. Numba is imported
+    # here on first use only; the compiled kernel is cached under scripts/__pycache__.
+    try:
+        from numba import njit, prange
+    except ImportError:  # optional: large grids then use the NumPy slab scan
+        return None
+
+    @njit(parallel=True, cache=True)
+    def scan_loop(v, cg1, cg2, ca1, ca2, wg, wa, wc, low, high):
+        # Counts and (+1,+1,+1) monotonicity violations with rows of d1 spread over
+        # threads; the neighbour rank is recomputed, so no cube is stored.
+        # No fastmath: the score must keep structural_score's order.
+        n = v.shape[0]
+        deny = 0
+        abstain = 0
+        allow = 0
+        violations = 0
+        for i in prange(n):
+            for j in range(n):
+                plane = wg * (cg1 * v[i] + cg2 * v[j]) + wa * (ca1 * v[i] + ca2 * v[j])
+                has_next = i + 1 < n and j + 1 < n
+                plane1 = 0.0
+                if has_next:
+                    plane1 = (wg * (cg1 * v[i + 1] + cg2 * v[j + 1])
+                              + wa * (ca1 * v[i + 1] + ca2 * v[j + 1]))
+                for k in range(n):
+                    score = plane + wc * v[k]
+                    if score < low:
+                        deny += 1
+                        r0 = 0
+                    elif score <= high:
+                        abstain += 1
+                        r0 = 1
+                    else:
+                        allow += 1
+                        r0 = 2
+                    if has_next and k + 1 < n:
+                        score1 = plane1 + wc * v[k + 1]
+                        r1 = 0 if score1 < low else 1 if score1 <= high else 2
+                        if r1 < r0:
+                            violations += 1
+        return deny, abstain, allow, violations
+
+    return scan_loop
+
+
+def scan_parallel(adapter: Adapter, vals: List[float], p: GateParams) -> Optional[ScanResult]:
+    # Same scan as scan_python, as one parallel Numba pass (see parallel_kernel).
+    # None when Numba is missing or the adapter is not linear in (d1, d2).
+    kernel = parallel_kernel()
+    if kernel is None:
+        return None
+    v = np.asarray(vals, dtype=np.float64)
+    coeffs = linear_coeffs(adapter, v)
+    if coeffs is None:
+        return None
+    n_deny, n_abstain, n_allow, violations = kernel(
+        v, *coeffs, p.wg, p.wa, p.wc, p.tau - p.band, p.tau + p.band
+    )
+    counts = {"DENY": int(n_deny), "ABSTAIN": int(n_abstain), "ALLOW": int(n_allow)}
+    return counts, int(violations)
+
+
 def run_domain(domain_name: str, tau: float, band: float, grid_n: int) -> Dict[str, str]:
     p = GateParams(tau=tau, band=band)
     vals = grid_values(grid_n)
 
-    counts = {"DENY": 0, "ABSTAIN": 0, "ALLOW": 0}
-    status_map: Dict[Tuple[int, int, int], str] = {}
-
     # choose adapter
     if domain_name == "PHYSICS_PHASE":
         adapter = adapter_physics_phase
@@ -161,24 +306,12 @@ def run_domain(domain_name: str, tau: float, band: float, grid_n: int) -> Dict[s
     else:
         raise ValueError(f"Unknown domain: {domain_name}")
 
-    for i1, d1 in enumerate(vals):
-        for i2, d2 in enumerate(vals):
-            for i3, d3 in enumerate(vals):
-                g, a_int, c = adapter(d1, d2, d3)
-                score = structural_score(g, a_int, c, p)
-                st = gate_status(score, p)
-                counts[st] += 1
-                status_map[(i1, i2, i3)] = st
-
-    # monotonicity check under uniform increase of all domain drivers (+1,+1,+1)
-    violations = 0
-    for i1 in range(grid_n - 1):
-        for i2 in range(grid_n - 1):
-            for i3 in range(grid_n - 1):
-                st0 = status_map[(i1, i2, i3)]
-                st1 = status_map[(i1 + 1, i2 + 1, i3 + 1)]
-                if status_rank(st1) < status_rank(st0):
-                    violations += 1
+    result = None
+    if np is not None and grid_n ** 3 >= PARALLEL_MIN_CELLS:
+        result = scan_parallel(adapter, vals, p)
+    if result is None:
+        result = (scan_python if np is None else scan_numpy)(adapter, vals, p)
+    counts, violations = result
 
     total = grid_n ** 3
     return {
@@ -195,13 +328,13 @@ def run_domain(domain_name: str, tau: float, band: float, grid_n: int) -> Dict[s
     }
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="SSTS Phase 6 cross-domain invariance (internal)")
     ap.add_argument("--grid_n", type=safe_int, default=11)
     ap.add_argument("--tau", type=safe_float, default=0.62)
     ap.add_argument("--band", type=safe_float, default=0.05)
     ap.add_argument("--out_csv", type=str, default="outputs/ssts_phase6_cross_domain.csv")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     if args.grid_n < 2:
         raise ValueError("--grid_n must be >= 2")
@@ -224,7 +357,8 @@ def main() -> int:
         rows.append(r)
         print(f"{d}: deny={r['deny']}, abstain={r['abstain']}, allow={r['allow']}, mono={r['monotonicity']}")
 
-    write_csv(args.out_csv, rows)
+    # every cell is a number or a fixed label, so rows need no csv quoting
+    write_lines_csv(args.out_csv, FIELDNAMES, [",".join([r[k] for k in FIELDNAMES]) + "\r\n" for r in rows])
     print("")
     print(f"Wrote evidence CSV: {args.out_csv}")
     return 0
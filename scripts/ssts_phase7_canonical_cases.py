@@ -33,67 +33,30 @@ from __future__ import annotations
 
 import argparse
 import csv
-import os
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import io
+from typing import Dict, List, Optional, Sequence, Tuple
 
+from ssts_core import STATUS_NAMES, GateParams, clamp01, ensure_parent_dir, safe_float, score_and_rank_cols
 
-def safe_float(x: str) -> float:
-    try:
-        return float(x)
-    except Exception as e:
-        raise ValueError(f"Invalid float: {x}") from e
+FIELDNAMES = (
+    "phase", "case_id", "case_name", "variant", "energy_legal", "g", "a_int", "c", "note",
+    "wg", "wa", "wc", "tau", "band", "score", "status",
+)
+SUMMARY_FIELDNAMES = ("metric", "value")
 
 
-def clamp01(x: float) -> float:
-    if x < 0.0:
-        return 0.0
-    if x > 1.0:
-        return 1.0
-    return x
-
-
-@dataclass(frozen=True)
-class GateParams:
-    wg: float = 0.45
-    wa: float = 0.35
-    wc: float = 0.20
-    tau: float = 0.62
-    band: float = 0.05
-
-
-def structural_score(g: float, a_int: float, c: float, p: GateParams) -> float:
-    g = clamp01(g)
-    a_int = clamp01(a_int)
-    c = clamp01(c)
-    return (p.wg * g) + (p.wa * a_int) + (p.wc * c)
-
-
-def gate_status(score: float, p: GateParams) -> str:
-    low = p.tau - p.band
-    high = p.tau + p.band
-    if score < low:
-        return "DENY"
-    if score <= high:
-        return "ABSTAIN"
-    return "ALLOW"
-
-
-def ensure_parent_dir(path: str) -> None:
-    d = os.path.dirname(path)
-    if d:
-        os.makedirs(d, exist_ok=True)
-
-
-def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
+def write_csv(path: str, fieldnames: Sequence[str], rows: List[Dict[str, str]]) -> None:
     ensure_parent_dir(path)
     if not rows:
         raise ValueError("No rows to write")
+    # Case notes are free text (commas, parentheses), so unlike ssts_core.write_lines_csv
+    # the csv module still does the quoting; the table is built in memory and written once.
+    buf = io.StringIO(newline="")
+    w = csv.DictWriter(buf, fieldnames=fieldnames)
+    w.writeheader()
+    w.writerows(rows)
     with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
-        w.writeheader()
-        for r in rows:
-            w.writerow(r)
+        f.write(buf.getvalue())
 
 
 # -----------------------------
@@ -104,11 +67,27 @@ def write_csv(path: str, rows: List[Dict[str, str]]) -> None:
 # "energy_legal" indicates energy is present/available in the scenario,
 # but it does not drive admissibility by design.
 
-def canonical_cases() -> List[Dict[str, str]]:
+# (g, a_int, c) columns, one entry per case
+Columns = Tuple[List[float], List[float], List[float]]
+
+
+def canonical_cases() -> Tuple[List[Dict[str, str]], Columns]:
+    """
+    Returns the case rows (metadata plus g/a_int/c as written to the evidence
+    CSV) and the matching (g, a_int, c) columns for scoring. The columns hold
+    the 6-decimal values the CSV shows, so a score can be recomputed from the
+    evidence file; round(x, 6) is correctly rounded, like the "%.6f" cells.
+    """
     cases: List[Dict[str, str]] = []
+    g_col: List[float] = []
+    a_col: List[float] = []
+    c_col: List[float] = []
 
     def add(case_id: str, case_name: str, variant: str, energy_legal: int,
             g: float, a_int: float, c: float, note: str) -> None:
+        g_col.append(round(clamp01(g), 6))
+        a_col.append(round(clamp01(a_int), 6))
+        c_col.append(round(clamp01(c), 6))
         cases.append({
             "phase": "7",
             "case_id": case_id,
@@ -171,10 +150,10 @@ def canonical_cases() -> List[Dict[str, str]]:
         0.60, 0.55, 0.05,
         "Energy available; no pathway/context -> abstain/deny (safe default).")
 
-    return cases
+    return cases, (g_col, a_col, c_col)
 
 
-def main() -> int:
+def main(argv: Optional[Sequence[str]] = None) -> int:
     ap = argparse.ArgumentParser(description="SSTS Phase 7 canonical case series (deterministic)")
     ap.add_argument("--tau", type=safe_float, default=0.62)
     ap.add_argument("--band", type=safe_float, default=0.05)
@@ -183,7 +162,7 @@ def main() -> int:
     ap.add_argument("--wc", type=safe_float, default=0.20)
     ap.add_argument("--out_csv", type=str, default="outputs/ssts_phase7_canonical_cases.csv")
     ap.add_argument("--out_summary", type=str, default="outputs/ssts_phase7_canonical_summary.csv")
-    args = ap.parse_args()
+    args = ap.parse_args(argv)
 
     if args.tau < 0.0 or args.tau > 1.0:
         raise ValueError("--tau must be in [0,1]")
@@ -199,18 +178,18 @@ def main() -> int:
 
     p = GateParams(wg=wg, wa=wa, wc=wc, tau=float(args.tau), band=float(args.band))
 
-    rows_in = canonical_cases()
+    rows_in, (g_col, a_col, c_col) = canonical_cases()
     rows_out: List[Dict[str, str]] = []
-    counts = {"DENY": 0, "ABSTAIN": 0, "ALLOW": 0}
 
-    for r in rows_in:
-        g = float(r["g"])
-        a_int = float(r["a_int"])
-        c = float(r["c"])
-        score = structural_score(g, a_int, c, p)
-        status = gate_status(score, p)
-        counts[status] += 1
+    # score and gate column-wise, then attach to the case rows
+    low = p.tau - p.band
+    high = p.tau + p.band
+    # g, a_int, c are clamped to [0,1] once, when the cases are defined
+    scores, ranks = score_and_rank_cols(g_col, a_col, c_col, p.wg, p.wa, p.wc, low, high)
+    counts = {name: ranks.count(i) for i, name in enumerate(STATUS_NAMES)}
 
+    for r, score, rank in zip(rows_in, scores, ranks):
+        status = STATUS_NAMES[rank]
         out = dict(r)
         out["wg"] = f"{p.wg:.6f}"
         out["wa"] = f"{p.wa:.6f}"
@@ -221,7 +200,7 @@ def main() -> int:
         out["status"] = status
         rows_out.append(out)
 
-    write_csv(args.out_csv, rows_out)
+    write_csv(args.out_csv, FIELDNAMES, rows_out)
 
     # summary
     summary_rows = [
@@ -235,7 +214,7 @@ def main() -> int:
         {"metric": "wa", "value": f"{p.wa:.6f}"},
         {"metric": "wc", "value": f"{p.wc:.6f}"},
     ]
-    write_csv(args.out_summary, summary_rows)
+    write_csv(args.out_summary, SUMMARY_FIELDNAMES, summary_rows)
 
     print("SSTS Phase 7 — Canonical Case Series")
     print("-----------------------------------")
@@ -0,0 +1,32 @@
+import io
+import unittest
+from unittest import mock
+
+from support import load
+
+phase2 = load("ssts_gate_sweep_phase2")
+
+
+class SweepBackendTest(unittest.TestCase):
+    # sweep_numpy must write the same rows and return the same counts and
+    # monotonicity result as the stdlib reference sweep.
+
+    def sweep(self, fn, grid_n, tau, band):
+        out = io.StringIO(newline="")
+        result = fn(phase2.grid_values(grid_n), phase2.GateParams(tau=tau, band=band), out)
+        return out.getvalue(), result
+
+    @unittest.skipIf(phase2.np is None, "NumPy not installed")
+    def test_numpy_matches_python(self):
+        # a small CHUNK_ROWS makes the tiny grid span several slabs
+        with mock.patch.object(phase2, "CHUNK_ROWS", 50):
+            for tau, band in [(0.62, 0.05), (0.5, 0.0), (0.7, 0.2)]:
+                with self.subTest(tau=tau, band=band):
+                    self.assertEqual(
+                        self.sweep(phase2.sweep_numpy, 9, tau, band),
+                        self.sweep(phase2.sweep_python, 9, tau, band),
+                    )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,32 @@
+import os
+import tempfile
+import unittest
+
+from support import load, read_bytes, run_main
+
+phase3 = load("ssts_phase3_tau_band_sweep")
+
+
+class SweepBackendTest(unittest.TestCase):
+
+    def test_jit_matches_python(self):
+        if phase3.sweep_jit() is None:
+            self.skipTest("NumPy or Numba not installed")
+        for tau, band in [(0.62, 0.05), (0.55, 0.0), (0.7, 0.08)]:
+            with self.subTest(tau=tau, band=band):
+                self.assertEqual(
+                    phase3.run_one(9, tau, band, use_jit=True),
+                    phase3.run_one(9, tau, band, use_jit=False),
+                )
+
+    def test_jobs_keep_config_order(self):
+        with tempfile.TemporaryDirectory() as d:
+            serial = os.path.join(d, "serial.csv")
+            pooled = os.path.join(d, "pooled.csv")
+            run_main(phase3, ["--grid_n", "6", "--out_csv", serial])
+            run_main(phase3, ["--grid_n", "6", "--jobs", "3", "--out_csv", pooled])
+            self.assertEqual(read_bytes(pooled), read_bytes(serial))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,27 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from support import load, rsmi_lines, run_rsmi_phase, write_rsmi
+
+phase4a1 = load("ssts_phase4a1_negative_controls")
+
+
+class BatchBackendTest(unittest.TestCase):
+
+    @unittest.skipIf(phase4a1.np is None, "NumPy not installed")
+    def test_numpy_matches_stdlib(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            rsmi = write_rsmi(os.path.join(tmp, "in.rsmi"), rsmi_lines(300))
+            # small batches so the column scoring runs over several flushes
+            with mock.patch.object(phase4a1, "BATCH_LINES", 7):
+                for band in ("0.05", "0", "-0.1"):
+                    with self.subTest(band=band):
+                        with mock.patch.object(phase4a1, "np", None):
+                            expected = run_rsmi_phase(phase4a1, tmp, rsmi, "stdlib", "--band", band)
+                        self.assertEqual(run_rsmi_phase(phase4a1, tmp, rsmi, "numpy", "--band", band), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import io
+import os
+import tempfile
+import unittest
+
+from support import ENDINGS, MIXED_ENDINGS, load, rsmi_lines, run_rsmi_phase, text_mode_lines, write_rsmi
+
+phase4a2 = load("ssts_phase4a2_direction_coherence")
+
+
+class ReaderTest(unittest.TestCase):
+
+    def test_iter_lines_splits_like_text_mode(self):
+        self.assertEqual(
+            [line.strip() for line in phase4a2.iter_lines(io.BytesIO(MIXED_ENDINGS))],
+            text_mode_lines(MIXED_ENDINGS),
+        )
+
+    def test_line_endings_give_same_output(self):
+        lines = rsmi_lines(300)
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = {}
+            for name, newline in ENDINGS.items():
+                rsmi = write_rsmi(os.path.join(tmp, f"{name}.rsmi"), lines, newline)
+                runs[name] = run_rsmi_phase(phase4a2, tmp, rsmi, name)
+        self.assertEqual(runs["crlf"], runs["lf"])
+        self.assertEqual(runs["cr"], runs["lf"])
+
+
+if __name__ == "__main__":
+    unittest.main()
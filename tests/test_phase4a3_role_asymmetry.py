@@ -0,0 +1,58 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from support import ENDINGS, MIXED_ENDINGS, load, rsmi_lines, run_rsmi_phase, text_mode_lines, write_rsmi
+
+phase4a3 = load("ssts_phase4a3_role_asymmetry")
+
+
+class ReaderTest(unittest.TestCase):
+
+    def test_iter_lines_splits_like_text_mode(self):
+        self.assertEqual(
+            [line.strip() for line in phase4a3.iter_lines(io.BytesIO(MIXED_ENDINGS))],
+            text_mode_lines(MIXED_ENDINGS),
+        )
+
+    def test_line_endings_give_same_output(self):
+        lines = rsmi_lines(300)
+        with tempfile.TemporaryDirectory() as tmp:
+            runs = {}
+            for name, newline in ENDINGS.items():
+                rsmi = write_rsmi(os.path.join(tmp, f"{name}.rsmi"), lines, newline)
+                runs[name] = run_rsmi_phase(phase4a3, tmp, rsmi, name)
+        self.assertEqual(runs["crlf"], runs["lf"])
+        self.assertEqual(runs["cr"], runs["lf"])
+
+
+class BatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        # long reactant sides take the NumPy sort in sorted_bytes
+        lines = rsmi_lines(300) + ["CCCCCCCCCC.c1ccccc1.CC(=O)O.[Na+].CCN(CC)CC>O>CCO"] * 5
+        self.rsmi = write_rsmi(os.path.join(self.tmp.name, "in.rsmi"), lines)
+
+    def run_phase(self, tag, *extra):
+        # every_k 1 and small batches so each window spans several batches
+        with mock.patch.object(phase4a3, "BATCH_ROWS", 7):
+            return run_rsmi_phase(phase4a3, self.tmp.name, self.rsmi, tag, "--every_k", "1", *extra)
+
+    @unittest.skipIf(phase4a3.np is None, "NumPy not installed")
+    def test_numpy_matches_stdlib(self):
+        for band in ("0.05", "0", "-0.1"):
+            with self.subTest(band=band):
+                with mock.patch.object(phase4a3, "np", None):
+                    expected = self.run_phase("stdlib", "--band", band)
+                self.assertEqual(self.run_phase("numpy", "--band", band), expected)
+
+    def test_jobs_keep_input_order(self):
+        self.assertEqual(self.run_phase("jobs", "--jobs", "3"), self.run_phase("serial"))
+
+
+if __name__ == "__main__":
+    unittest.main()
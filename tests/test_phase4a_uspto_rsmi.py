@@ -0,0 +1,44 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from support import ENDINGS, MIXED_ENDINGS, load, rsmi_lines, run_rsmi_phase, text_mode_lines, write_rsmi
+
+phase4a = load("ssts_phase4a_uspto_rsmi")
+
+
+class ReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_iter_lines_splits_like_text_mode(self):
+        self.assertEqual(
+            [line.strip() for line in phase4a.iter_lines(io.BytesIO(MIXED_ENDINGS))],
+            text_mode_lines(MIXED_ENDINGS),
+        )
+
+    def test_line_endings_give_same_output(self):
+        lines = rsmi_lines(300)
+        runs = {}
+        for name, newline in ENDINGS.items():
+            rsmi = write_rsmi(os.path.join(self.tmp.name, f"{name}.rsmi"), lines, newline)
+            runs[name] = run_rsmi_phase(phase4a, self.tmp.name, rsmi, name)
+        self.assertEqual(runs["crlf"], runs["lf"])
+        self.assertEqual(runs["cr"], runs["lf"])
+
+    def test_jobs_keep_input_order(self):
+        rsmi = write_rsmi(os.path.join(self.tmp.name, "in.rsmi"), rsmi_lines(300))
+        # small batches so every window spreads over several workers
+        with mock.patch.object(phase4a, "BATCH_LINES", 7):
+            self.assertEqual(
+                run_rsmi_phase(phase4a, self.tmp.name, rsmi, "jobs", "--jobs", "3"),
+                run_rsmi_phase(phase4a, self.tmp.name, rsmi, "serial"),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
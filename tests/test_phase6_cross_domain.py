@@ -0,0 +1,44 @@
+import unittest
+from unittest import mock
+
+from support import load
+
+phase6 = load("ssts_phase6_cross_domain_invariance")
+
+ADAPTERS = (
+    phase6.adapter_physics_phase,
+    phase6.adapter_chem_reaction,
+    phase6.adapter_materials_yield,
+)
+PARAMS = (
+    phase6.GateParams(),
+    phase6.GateParams(tau=0.5, band=0.0),
+    phase6.GateParams(tau=0.4, band=0.15),
+)
+
+
+class ScanBackendTest(unittest.TestCase):
+    # Each accelerated scan must give the stdlib scan's counts and violations.
+
+    def check(self, scan):
+        vals = phase6.grid_values(9)
+        for adapter in ADAPTERS:
+            for p in PARAMS:
+                with self.subTest(adapter=adapter.__name__, tau=p.tau, band=p.band):
+                    self.assertEqual(scan(adapter, vals, p), phase6.scan_python(adapter, vals, p))
+
+    @unittest.skipIf(phase6.np is None, "NumPy not installed")
+    def test_numpy_matches_python(self):
+        # a small CHUNK_CELLS makes the grid span several slabs
+        with mock.patch.object(phase6, "CHUNK_CELLS", 100):
+            self.check(phase6.scan_numpy)
+
+    @unittest.skipIf(phase6.np is None, "NumPy not installed")
+    def test_parallel_kernel_matches_python(self):
+        if phase6.parallel_kernel() is None:
+            self.skipTest("Numba not installed")
+        self.check(phase6.scan_parallel)
+
+
+if __name__ == "__main__":
+    unittest.main()